@@ -0,0 +1,47 @@
+"""
+Memory and per-query latency of sparse CBF scoring against the dense cosine_similarity path.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_cbf_sparse.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import cbf
+
+
+def median_ms(fn, n_calls=50):
+    timings = []
+    for _ in range(n_calls):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    sparse = cbf.weighted_features
+    dense = sparse.toarray().astype(np.float64)
+    sparse_mb = (sparse.data.nbytes + sparse.indices.nbytes + sparse.indptr.nbytes
+                 + cbf.feature_norms.nbytes) / 2**20
+
+    rng = np.random.default_rng(42)
+    query = np.zeros(sparse.shape[1])
+    query[rng.choice(sparse.shape[1] - 3, size=4, replace=False)] = 1.5
+    query[-3:] = 0.25
+
+    dense_scores = cosine_similarity(query[None, :], dense).ravel()
+    sparse_scores = cbf.sparse_cosine(sparse, cbf.feature_norms, query)
+
+    print(f"Games: {sparse.shape[0]} | features: {sparse.shape[1]} | "
+          f"density: {sparse.nnz / np.prod(sparse.shape):.2%}")
+    print(f"Memory: dense float64 {dense.nbytes / 2**20:.1f} MiB | sparse CSR + norms {sparse_mb:.1f} MiB")
+    print(f"Latency: dense cosine_similarity {median_ms(lambda: cosine_similarity(query[None, :], dense)):.2f} ms"
+          f" | sparse matvec {median_ms(lambda: cbf.sparse_cosine(sparse, cbf.feature_norms, query)):.2f} ms")
+    print(f"Max score difference: {np.abs(dense_scores - sparse_scores).max():.2e}")
@@ -0,0 +1,45 @@
+"""
+Batched multi-user CF scoring versus one fold-in per user.
+
+Run from the project root:
+    python scripts/benchmark_cf_batch.py [n_users]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import get_cf_engine, to_ragged
+
+
+if __name__ == "__main__":
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_loop = min(n_users, 200)
+    k = 10
+    rng = np.random.default_rng(42)
+
+    engine = get_cf_engine()
+    liked_sets = [rng.choice(engine.item_ids, size=rng.integers(1, 20), replace=False)
+                  for _ in range(n_users)]
+    offsets, liked_ids = to_ragged(liked_sets)
+
+    t0 = time.perf_counter()
+    for liked in liked_sets[:n_loop]:
+        engine.top_k(liked, k)
+    loop_s = (time.perf_counter() - t0) / n_loop * n_users
+
+    t0 = time.perf_counter()
+    top_ids, _ = engine.top_k_batch(offsets, liked_ids, k=k)
+    batch_s = time.perf_counter() - t0
+
+    agree = np.mean([
+        np.array_equal(engine.top_k(liked_sets[u], k)[0], top_ids[u]) for u in range(min(n_users, 50))
+    ])
+
+    print(f"Users: {n_users} | items: {engine.n_items} | top-{k}")
+    print(f"per-user loop (extrapolated from {n_loop}): {loop_s:8.2f} s")
+    print(f"top_k_batch:                          {batch_s:8.2f} s")
+    print(f"Speedup: {loop_s / batch_s:.1f}x | top-{k} agreement with loop: {agree:.0%}")
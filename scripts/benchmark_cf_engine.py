@@ -0,0 +1,54 @@
+"""
+Cold-load versus warm-call benchmark for the CF scorer.
+
+"cold" reproduces the old per-request path: decompress V_final_quantized.npz,
+re-read games.csv and score. "warm" scores with a resident CFEngine.
+
+Run from the project root:
+    python scripts/benchmark_cf_engine.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import CFEngine, MODEL_PATH, GAMES_PATH
+
+
+def time_calls(fn, n_calls):
+    timings = []
+    for _ in range(n_calls):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return np.array(timings) * 1000
+
+
+def report(label, timings_ms):
+    print(f"{label:<28} median {np.median(timings_ms):8.2f} ms | "
+          f"p95 {np.percentile(timings_ms, 95):8.2f} ms")
+
+
+if __name__ == "__main__":
+    n_calls = 20
+    rng = np.random.default_rng(42)
+
+    t0 = time.perf_counter()
+    engine = CFEngine.from_files(MODEL_PATH, GAMES_PATH)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    liked_sets = [rng.choice(engine.item_ids, size=5, replace=False) for _ in range(n_calls)]
+    it = iter(liked_sets * 2)
+
+    cold = time_calls(lambda: CFEngine.from_files(MODEL_PATH, GAMES_PATH).score(next(it)), n_calls)
+    warm = time_calls(lambda: engine.score(next(it)), n_calls)
+    warm_top = time_calls(lambda: engine.top_k(liked_sets[0], k=10), n_calls)
+
+    print(f"Items: {engine.n_items} | factors: {engine.V.shape[1]} | one-time load: {load_ms:.1f} ms")
+    report("cold (load + score)", cold)
+    report("warm score()", warm)
+    report("warm top_k(k=10)", warm_top)
+    print(f"Speedup per call: {np.median(cold) / np.median(warm):.1f}x")
@@ -0,0 +1,54 @@
+"""
+Recall@k versus latency of the IVF index against exact CF top-k.
+
+Both paths start from the same folded-in user vector, so the timings only cover
+candidate scoring and selection. Run from the project root after build_cf_index.py:
+    python scripts/benchmark_cf_index.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import get_cf_engine
+
+
+def exact_top_k(V, u, k, exclude_rows):
+    scores = V @ u
+    scores[exclude_rows] = -np.inf
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+if __name__ == "__main__":
+    k = 10
+    n_queries = 200
+    rng = np.random.default_rng(42)
+
+    engine = get_cf_engine()
+    if engine.index is None:
+        sys.exit("No index found, run scripts/build_cf_index.py first.")
+
+    queries = []
+    for _ in range(n_queries):
+        liked = rng.choice(engine.item_ids, size=rng.integers(1, 10), replace=False)
+        queries.append((engine.user_vector(liked).astype(np.float32), engine.ids_to_rows(liked)))
+
+    t0 = time.perf_counter()
+    truth = [exact_top_k(engine.V, u, k, rows) for u, rows in queries]
+    exact_ms = (time.perf_counter() - t0) / n_queries * 1000
+
+    print(f"Items: {engine.n_items} | lists: {engine.index.n_lists} | queries: {n_queries} | k={k}")
+    print(f"{'n_probe':>8} {'recall@k':>9} {'ms/query':>9} {'scanned':>8}")
+    print(f"{'exact':>8} {1.0:9.3f} {exact_ms:9.3f} {engine.n_items:8d}")
+    for n_probe in [1, 2, 4, 8, 16, 32]:
+        t0 = time.perf_counter()
+        found = [engine.index.search(engine.V, u, k=k, n_probe=n_probe, exclude_rows=rows)[0]
+                 for u, rows in queries]
+        ms = (time.perf_counter() - t0) / n_queries * 1000
+        recall = np.mean([len(np.intersect1d(f, t)) / k for f, t in zip(found, truth)])
+        scanned = np.mean([len(engine.index.candidates(u, n_probe)) for u, _ in queries])
+        print(f"{n_probe:8d} {recall:9.3f} {ms:9.3f} {int(scanned):8d}")
@@ -0,0 +1,58 @@
+"""
+Accuracy, memory and latency of int8 CF scoring (QuantizedCFEngine) against the float32 path.
+
+Accuracy is the Spearman rank correlation between the two score vectors over the float
+path's top-100 games, plus the overlap of the two top-100 sets.
+Run from the project root:
+    python scripts/benchmark_cf_int8.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.stats import spearmanr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import CFEngine, QuantizedCFEngine
+
+
+def median_ms(fn, args_list):
+    timings = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    n_queries = 100
+    top_n = 100
+    rng = np.random.default_rng(42)
+
+    float_engine = CFEngine.from_files()
+    int8_engine = QuantizedCFEngine.from_files()
+
+    correlations, overlaps, queries = [], [], []
+    for _ in range(n_queries):
+        liked = rng.choice(float_engine.item_ids, size=rng.integers(1, 10), replace=False)
+        u = float_engine.user_vector(liked)
+        queries.append((u,))
+
+        exact = float_engine.item_scores(u)
+        approx = int8_engine.item_scores(u)
+        top_exact = np.argsort(-exact)[:top_n]
+        top_approx = np.argsort(-approx)[:top_n]
+
+        correlations.append(spearmanr(exact[top_exact], approx[top_exact]).statistic)
+        overlaps.append(len(np.intersect1d(top_exact, top_approx)) / top_n)
+
+    print(f"Items: {float_engine.n_items} | queries: {n_queries}")
+    print(f"Resident V: float32 {float_engine.V.nbytes / 2**20:.1f} MiB | "
+          f"int8 {int8_engine.V_q.nbytes / 2**20:.1f} MiB")
+    print(f"Spearman on float top-{top_n}: mean {np.mean(correlations):.4f} | min {np.min(correlations):.4f}")
+    print(f"Top-{top_n} overlap:           mean {np.mean(overlaps):.3f} | min {np.min(overlaps):.3f}")
+    print(f"item_scores latency: float32 {median_ms(float_engine.item_scores, queries):.2f} ms | "
+          f"int8 {median_ms(int8_engine.item_scores, queries):.2f} ms")
@@ -0,0 +1,90 @@
+"""
+Cold-start time and bytes read of every runtime loader: parsing the csv against reading
+the projected columns of the Parquet copy written by build_columnar.py.
+
+Each loader runs in a fresh interpreter; bytes read are the process' read() syscall bytes
+(/proc/self/io rchar) during the load, so they count what was read whether or not the
+file was already in the page cache.
+Run from the project root after build_columnar.py:
+    python scripts/benchmark_columnar.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from catalog import CATALOG_PATH, DESCRIPTIONS_PATH, GAMES_COLUMNS, GAMES_DTYPES, LIST_COLUMNS
+from cf import GAMES_PATH
+from columnar import COLUMNAR_DIR, columnar_path, has_columnar, read_batches, read_table
+
+RATINGS_PATH = "./data/user_ratings.csv"
+
+
+def load_games(columnar_dir):
+    return read_table(CATALOG_PATH, columns=GAMES_COLUMNS, list_columns=LIST_COLUMNS,
+                      dtype=GAMES_DTYPES, columnar_dir=columnar_dir)
+
+
+def load_descriptions(columnar_dir):
+    return read_table(DESCRIPTIONS_PATH, columns=["bgg_id", "full_description"], columnar_dir=columnar_dir)
+
+
+def load_cf_item_ids(columnar_dir):
+    return read_table(GAMES_PATH, columns=["BGGId"], columnar_dir=columnar_dir)
+
+
+def load_app_details(columnar_dir):
+    columns = ["BGGId", "Name", "Description", "MinPlayers", "MaxPlayers",
+               "ComMinPlaytime", "ComMaxPlaytime", "MfgPlaytime"]
+    return read_table(GAMES_PATH, columns=columns, columnar_dir=columnar_dir)
+
+
+def load_ratings(columnar_dir):
+    n_rows = 0
+    for chunk in read_batches(RATINGS_PATH, ["BGGId", "Rating", "Username"], columnar_dir=columnar_dir,
+                              dtype={"BGGId": "int32", "Rating": "float32", "Username": "category"}):
+        n_rows += len(chunk)
+    return n_rows
+
+
+# loader -> (runtime consumer, csv it reads)
+LOADERS = {
+    "games table": (load_games, "ensemble/llm/filters", CATALOG_PATH),
+    "descriptions": (load_descriptions, "llm", DESCRIPTIONS_PATH),
+    "CF item ids": (load_cf_item_ids, "cf", GAMES_PATH),
+    "app details": (load_app_details, "app", GAMES_PATH),
+    "ratings": (load_ratings, "train_als", RATINGS_PATH),
+}
+
+
+def bytes_read():
+    with open("/proc/self/io") as f:
+        return int(next(line for line in f if line.startswith("rchar")).split()[1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        loader, fmt = LOADERS[sys.argv[1]][0], sys.argv[2]
+        before = bytes_read()
+        t0 = time.perf_counter()
+        loader(COLUMNAR_DIR if fmt == "parquet" else None)
+        print(f"{time.perf_counter() - t0} {bytes_read() - before}")
+        sys.exit(0)
+
+    print(f"{'loader':<14} {'used by':<22} {'csv':>18} {'parquet':>18} {'speedup':>8} {'bytes':>7}")
+    for name, (_, consumer, csv_path) in LOADERS.items():
+        if not os.path.exists(csv_path):
+            continue
+        results = {}
+        for fmt in ["csv", "parquet"]:
+            if fmt == "parquet" and not has_columnar(csv_path):
+                print(f"'{columnar_path(csv_path)}' missing, run scripts/build_columnar.py first")
+                sys.exit(1)
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), name, fmt],
+                                 check=True, capture_output=True, text=True).stdout.split()
+            results[fmt] = float(out[0]), int(out[1])
+        (csv_s, csv_b), (pq_s, pq_b) = results["csv"], results["parquet"]
+        print(f"{name:<14} {consumer:<22} {csv_s * 1000:7.0f} ms {csv_b / 2**20:6.1f} MiB"
+              f" {pq_s * 1000:7.0f} ms {pq_b / 2**20:6.1f} MiB {csv_s / pq_s:7.1f}x {pq_b / csv_b:6.1%}")
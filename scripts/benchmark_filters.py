@@ -0,0 +1,119 @@
+"""
+Latency of the attribute filters: the per-request pandas .apply over every game's label
+list against the prebuilt filters.LabelIndex, and the full set of pandas comparisons
+against filters.AttributeIndex (sorted numeric columns resolved with searchsorted).
+
+Run from the project root:
+    python scripts/benchmark_filters.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from filters import LABEL_COLUMNS, AttributeIndex, FilterEngine, build_label_indexes
+
+GAMES_FILE = "./data/games_master_data.csv"
+
+
+def semicolon_to_list(value):
+    if pd.isna(value) or value == "":
+        return []
+    return [item.strip() for item in str(value).split(';') if item.strip()]
+
+
+def apply_mask(games_df, attr_name, selected):
+    """The filter as model_ensemble used to compute it."""
+    selected_clean = [s.strip().lower() for s in selected if isinstance(s, str) and s.strip()]
+    return games_df[attr_name].apply(
+        lambda ga: isinstance(ga, list) and len(ga) > 0 and
+                   any(isinstance(a, str) and a.strip().lower() in selected_clean for a in ga)
+    ).values
+
+
+def pandas_mask(games_df, attributes):
+    """All attribute filters as model_ensemble used to compute them."""
+    mask = np.ones(len(games_df), dtype=bool)
+    for attr_name in LABEL_COLUMNS:
+        if attributes.get(attr_name):
+            mask &= apply_mask(games_df, attr_name, attributes[attr_name])
+    if len(attributes.get('game_weight', [])) == 2:
+        w_min, w_max = attributes['game_weight']
+        mask &= ((games_df['game_weight'] >= w_min) & (games_df['game_weight'] <= w_max)).values
+    if len(attributes.get('players', [])) == 2:
+        p_min, p_max = attributes['players']
+        mask &= ((games_df['players_max'] >= p_min) & (games_df['players_min'] <= p_max)).values
+    if len(attributes.get('play_time', [])) == 2:
+        t_min, t_max = attributes['play_time']
+        mask &= ((games_df['time_max'] >= t_min) & (games_df['time_min'] <= t_max)).values
+    if len(attributes.get('year_published', [])) == 2:
+        y_min, y_max = attributes['year_published']
+        mask &= ((games_df['year_published'] >= y_min) & (games_df['year_published'] <= y_max)).values
+    if attributes.get('min_rating'):
+        mask &= (games_df['avg_rating'] >= attributes['min_rating'][0]).values
+    return mask
+
+
+def median_us(fn, n_calls=50):
+    timings = []
+    for _ in range(n_calls):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1e6
+
+
+if __name__ == "__main__":
+    games_df = pd.read_csv(
+        GAMES_FILE,
+        usecols=['simple_game_categories', 'simple_game_mechanics', 'game_types',
+                 'game_weight', 'avg_rating', 'players_min', 'players_max',
+                 'time_min', 'time_max', 'year_published'],
+        converters={col: semicolon_to_list for col in
+                    ['simple_game_categories', 'simple_game_mechanics', 'game_types']},
+    ).rename(columns={'simple_game_categories': 'game_categories',
+                      'simple_game_mechanics': 'game_mechanics'})
+
+    t0 = time.perf_counter()
+    label_indexes = build_label_indexes(games_df)
+    build_ms = (time.perf_counter() - t0) * 1000
+    index_kb = sum(index.bits.nbytes for index in label_indexes.values()) / 1024
+    print(f"{len(games_df):,} games, index built in {build_ms:.0f} ms ({index_kb:.0f} KiB)")
+
+    rng = np.random.default_rng(0)
+    for attr_name in LABEL_COLUMNS:
+        index = label_indexes[attr_name]
+        # original casing, as the sidebar sends it
+        originals = sorted({a.strip() for ga in games_df[attr_name] for a in ga})
+        selected = list(rng.choice(originals, size=min(3, len(originals)), replace=False))
+
+        assert np.array_equal(apply_mask(games_df, attr_name, selected), index.mask(selected))
+        apply_us = median_us(lambda: apply_mask(games_df, attr_name, selected))
+        index_us = median_us(lambda: index.mask(selected), n_calls=1000)
+        print(f"{attr_name:<16} {len(index.labels):4d} labels | pandas apply {apply_us / 1000:7.2f} ms"
+              f" | label index {index_us:7.1f} us | x{apply_us / index_us:,.0f}")
+
+    attribute_index = AttributeIndex.build(games_df)
+    engine = FilterEngine(attribute_index)
+    queries = {
+        "numeric only": {'game_weight': [1.5, 3.5], 'players': [2, 5], 'play_time': [30, 90],
+                         'min_rating': [6.5], 'year_published': [2010, 2025]},
+        "sidebar mix": {'game_categories': ['Abstract / Strategy'], 'game_weight': [1.5, 2.8],
+                        'players': [2, 5], 'min_rating': [7.5], 'year_published': [1999, 2025]},
+        "single range": {'year_published': [2015, 2016]},
+    }
+    print()
+    for name, attributes in queries.items():
+        expected = pandas_mask(games_df, attributes)
+        assert np.array_equal(expected, attribute_index.mask(attributes))
+        pandas_us = median_us(lambda: pandas_mask(games_df, attributes))
+        index_us = median_us(lambda: attribute_index.mask(attributes), n_calls=1000)
+        engine.mask(attributes)
+        cached_us = median_us(lambda: engine.mask(attributes), n_calls=1000)
+        print(f"{name:<16} {expected.sum():6,} rows | pandas {pandas_us / 1000:7.2f} ms"
+              f" | attribute index {index_us:7.1f} us | x{pandas_us / index_us:,.0f}"
+              f" | cached predicate {cached_us:5.1f} us")
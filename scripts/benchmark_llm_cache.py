@@ -0,0 +1,86 @@
+"""
+Persistent LLM score cache (llm.get_llm_cache) over a replayed query stream.
+
+Queries are drawn with a skewed (Zipf-like) popularity from a set of descriptions and
+sidebar filters, as a deployed app sees them: a few popular ones and a long tail. The
+LLM is the local fake endpoint of fake_openai.py with a fixed delay, so the stream
+runs offline; it counts the API requests and the prompt characters (about 4 per token)
+that were actually sent. The stream is replayed once with a cold cache and once more
+after a simulated restart that keeps only the SQLite file.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_llm_cache.py [--queries 300] [--delay 0.3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+DESCRIPTIONS = ["cooperative adventure with a story", "light party game for a big group",
+                "heavy economic euro", "two player duel", "dungeon crawl with miniatures",
+                "relaxing family game", "deck building with combos", "area control war game"]
+FILTERS = [{}, {"players": [2, 2]}, {"game_weight": [1.0, 2.5]}, {"game_weight": [3.0, 5.0]},
+           {"play_time": [30, 60], "players": [3, 5]}]
+
+
+def replay(llm, stream, cache_dir):
+    """Score every query of the stream; stats of a fresh cache instance on cache_dir."""
+    llm.LLM_CACHE_DIR = cache_dir
+    llm.get_llm_cache.cache_clear()
+    FakeOpenAI.requests = FakeOpenAI.prompt_chars = 0
+    latencies = []
+    for description, attributes in stream:
+        t0 = time.perf_counter()
+        llm.get_llm_scores(description, attributes)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return llm.get_llm_cache().stats(), np.array(latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--delay", type=float, default=0.3, help="seconds the fake LLM takes per call")
+    args = parser.parse_args()
+
+    server = serve()
+    FakeOpenAI.reset(delay=args.delay)
+
+    import llm
+
+    queries = [(d, f) for d in DESCRIPTIONS for f in FILTERS]
+    rng = np.random.default_rng(0)
+    popularity = 1 / np.arange(1, len(queries) + 1)
+    picks = rng.choice(len(queries), args.queries, p=popularity / popularity.sum())
+    # whitespace the normalized key ignores
+    stream = [(queries[i][0] + " " * int(rng.integers(2)), queries[i][1]) for i in picks]
+
+    print(f"{args.queries} queries, {len(set(picks))} distinct, fake LLM {args.delay * 1000:.0f} ms per call\n")
+    print(f"{'run':<16} {'requests':>9} {'~tokens':>9} {'hit rate':>9} {'miss ms':>8} {'hit ms':>7}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # without a cache every query calls the API; the first 20 are timed and scaled to the stream
+        FakeOpenAI.requests = FakeOpenAI.prompt_chars = 0
+        latencies = []
+        for description, attributes in stream[:20]:
+            t0 = time.perf_counter()
+            llm.get_llm_scores(description, attributes, use_cache=False)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        print(f"{'no cache':<16} {FakeOpenAI.requests * args.queries // 20:9d}"
+              f" {FakeOpenAI.prompt_chars * args.queries / 20 / 4:9.0f}"
+              f" {0:9.1%} {np.median(latencies):8.1f} {'-':>7}")
+
+        for run in ["cold cache", "after restart"]:
+            stats, latencies = replay(llm, stream, cache_dir)
+            hits = latencies[latencies < args.delay * 1000]
+            misses = latencies[latencies >= args.delay * 1000]
+            print(f"{run:<16} {FakeOpenAI.requests:9d} {FakeOpenAI.prompt_chars / 4:9.0f} {stats['hit_rate']:9.1%} "
+                  f"{np.median(misses) if len(misses) else float('nan'):8.1f} "
+                  f"{np.median(hits) if len(hits) else float('nan'):7.2f}")
+        print(f"\ncache file: {os.path.getsize(os.path.join(cache_dir, 'llm_scores.sqlite')) / 2**10:.0f} KiB")
+    server.shutdown()
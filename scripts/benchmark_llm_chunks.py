@@ -0,0 +1,65 @@
+"""
+Chunked, concurrent LLM scoring (llm.request_llm_scores_async) against one prompt with
+every candidate, under an emulated slow LLM.
+
+The LLM is the local fake endpoint of fake_openai.py; it answers after delay + per_game
+seconds per game in the prompt, as a real model's latency grows with the rows it has to
+write. The pool is llm.candidate_pool() (200 games). Each variant reports the wall time,
+the requests sent, how many of the candidates got a score, the failed chunks, and
+whether the scores equal those of the single prompt (the fake scores a game the same
+whatever prompt it is in). The last variant fails a share of the requests at random to
+show the retries and the partial result.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_llm_chunks.py [--delay 0.5] [--per-game 0.04]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+DESCRIPTION = "cooperative adventure with a strong story"
+
+# variant -> (chunk size or None for one prompt, concurrency, share of failing requests)
+VARIANTS = [
+    ("single prompt", None, 1, 0.0),
+    ("chunks of 50, 4 at a time", 50, 4, 0.0),
+    ("chunks of 25, 4 at a time", 25, 4, 0.0),
+    ("chunks of 25, 8 at a time", 25, 8, 0.0),
+    ("chunks of 10, 8 at a time", 10, 8, 0.0),
+    ("chunks of 25, 4, 30% fail", 25, 4, 0.3),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds per request before the first row")
+    parser.add_argument("--per-game", type=float, default=0.04, help="seconds per game in the prompt")
+    args = parser.parse_args()
+
+    server = serve()
+    import llm
+
+    pool = llm.candidate_pool()
+    print(f"{len(pool)} candidates, fake LLM {args.delay:.2f} s + {args.per_game:.3f} s per game\n")
+    print(f"{'variant':<28} {'wall s':>7} {'requests':>8} {'scored':>7} {'failed':>6}  same scores")
+    reference = None
+    for name, chunk_size, concurrency, fail_rate in VARIANTS:
+        FakeOpenAI.reset(delay=args.delay, per_game=args.per_game, fail_rate=fail_rate)
+        t0 = time.perf_counter()
+        if chunk_size is None:
+            scores, errors = llm.request_llm_scores(DESCRIPTION, pool), []
+        else:
+            scores, errors = asyncio.run(llm.request_llm_scores_async(
+                DESCRIPTION, pool, chunk_size=chunk_size, concurrency=concurrency))
+        wall = time.perf_counter() - t0
+        reference = scores if reference is None else reference
+        same = all(reference.get(bgg_id) == score for bgg_id, score in scores.items())
+        print(f"{name:<28} {wall:7.2f} {FakeOpenAI.requests:8d} {len(scores):4d}/{len(pool):<3d} {len(errors):6d}  {same}")
+
+    server.shutdown()
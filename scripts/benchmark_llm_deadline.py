@@ -0,0 +1,78 @@
+"""
+Concurrent CF/CBF/LLM scoring and the ensemble deadline against a fake OpenAI endpoint.
+
+The LLM is the local fake endpoint of fake_openai.py, answering after an injected delay
+or with an HTTP 500, so no request leaves the machine. Each scenario runs ensemble_scores
+once and reports the wall time, the per-model times (concurrent, measured from dispatch),
+whether the result was degraded to beta=0 and whether the LLM contributed to it; the
+checks column compares that with what the scenario expects, and the script exits with
+status 1 if any scenario failed.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_llm_deadline.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+LIKED = [174430, 224517]
+ATTRIBUTES = {"game_weight": [2.0, 4.0], "players": [2, 4]}
+
+# scenario -> (LLM delay in s, HTTP status, ensemble deadline in s, expected degradation)
+SCENARIOS = [
+    ("fast LLM", 0.2, 200, 2.0, None),
+    ("slow LLM, no deadline", 1.5, 200, None, None),
+    ("slow LLM", 3.0, 200, 1.0, "timeout"),
+    ("late answer cached", 0.0, 200, 1.0, None),
+    ("LLM error", 0.0, 500, 5.0, "error"),
+]
+
+
+if __name__ == "__main__":
+    server = serve()
+    # no persistent LLM cache, every run must reach the server
+    os.environ["LLM_CACHE_DIR"] = ""
+
+    import llm
+    import model_ensemble
+    from score_cache import get_score_cache
+
+    llm.client = llm.client.with_options(max_retries=0)
+    print(f"{'scenario':<24} {'wall ms':>8} {'cf ms':>7} {'cbf ms':>7} {'llm ms':>8}  {'degraded':<28} {'llm used':<8} check")
+    previous = None
+    failed = []
+    for name, delay, status, deadline, expected in SCENARIOS:
+        FakeOpenAI.reset(delay=delay, status=status)
+        if name == "late answer cached":
+            # same query as the timed-out one, after its LLM answer came in
+            description = previous
+            time.sleep(3.0)
+        else:
+            description = f"cooperative adventure ({name})"
+        previous = description
+
+        timings = {}
+        t0 = time.perf_counter()
+        recommendations = model_ensemble.ensemble_scores(LIKED, [], [], ATTRIBUTES, description,
+                                                         n_recommendations=10, timings=timings,
+                                                         use_cache=False, deadline=deadline)
+        wall = (time.perf_counter() - t0) * 1000
+        degraded = recommendations.attrs["degraded"].get("llm", "")
+        llm_used = bool((recommendations["llm_score_component"] > 0).any())
+        ok = (degraded.startswith(expected) if expected else not degraded) and llm_used == (expected is None)
+        if deadline is not None:
+            ok = ok and wall < (deadline + 0.5) * 1000
+        if not ok:
+            failed.append(name)
+        print(f"{name:<24} {wall:8.0f} {timings['cf']:7.1f} {timings['cbf']:7.1f} {timings['llm']:8.0f}  "
+              f"{degraded[:28]:<28} {str(llm_used):<8} {'ok' if ok else 'FAILED'}")
+
+    print(f"\nscore cache: {get_score_cache().stats()}")
+    server.shutdown()
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
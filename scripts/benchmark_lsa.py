@@ -0,0 +1,76 @@
+"""
+The local LSA text scorer (lsa.py) against the OpenAI scorer in ensemble_scores.
+
+Runs ensemble_scores with text_scorer 'llm', 'lsa' and 'llm+lsa' for a few descriptions,
+the LLM being the local fake endpoint of fake_openai.py (0.5 s + 0.04 s per game by
+default), and reports the median wall time and text-stage time per scorer. For LSA it
+also reports the size of the embeddings and, as a sanity check of what it ranks, the
+overlap of its top 50 games with the BM25 top 50 of text_index.py (there are no relevance
+labels in the data, so no accuracy is reported).
+
+Run from the project root after pre_compute_CBF_data.py and build_lsa.py:
+    python scripts/benchmark_lsa.py [--delay 0.5] [--per-game 0.04]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+DESCRIPTIONS = [
+    "cooperative fantasy adventure with heroes and dungeons",
+    "economic trading game with trains and routes",
+    "a light party game with cards for a big family",
+    "space war game with dice",
+    "zombies survival cooperative",
+]
+LIKED = [174430, 224517]
+ATTRIBUTES = {"players": [2, 4]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds per request before the first row")
+    parser.add_argument("--per-game", type=float, default=0.04, help="seconds per game in the prompt")
+    args = parser.parse_args()
+
+    server = serve()
+    os.environ["LLM_CACHE_DIR"] = ""
+    import llm
+    import model_ensemble
+    from lsa import get_lsa_model
+    from score_cache import get_score_cache
+    from text_index import get_text_index
+
+    model, index = get_lsa_model(), get_text_index()
+    print(f"LSA: {model.embeddings.shape[1]} dimensions x {model.n_docs} games, "
+          f"{model.embeddings.nbytes / 2**20:.1f} MiB embeddings + {model.components.nbytes / 2**20:.1f} MiB components")
+
+    overlap = []
+    for description in DESCRIPTIONS:
+        lsa_top = set(model.doc_ids[np.argsort(-model.scores(description))[:50]])
+        bm25_top = set(index.doc_ids[np.argsort(-index.scores(description))[:50]])
+        overlap.append(len(lsa_top & bm25_top) / 50)
+    print(f"top-50 overlap with BM25: {np.mean(overlap):.0%} (min {min(overlap):.0%})\n")
+
+    FakeOpenAI.reset(delay=args.delay, per_game=args.per_game)
+    print(f"{'text scorer':<12} {'wall ms':>8} {'text ms':>8}  requests")
+    for scorer in ["llm", "lsa", "llm+lsa"]:
+        walls, text_ms = [], []
+        FakeOpenAI.requests = 0
+        for description in DESCRIPTIONS:
+            get_score_cache().clear()
+            llm.get_llm_cache().clear()
+            timings = {}
+            t0 = time.perf_counter()
+            model_ensemble.ensemble_scores(LIKED, [], [], ATTRIBUTES, description, timings=timings,
+                                           use_cache=False, text_scorer=scorer)
+            walls.append((time.perf_counter() - t0) * 1000)
+            text_ms.append(max(timings.get("llm", 0), timings.get("lsa", 0)))
+        print(f"{scorer:<12} {np.median(walls):8.1f} {np.median(text_ms):8.1f}  {FakeOpenAI.requests}")
+    server.shutdown()
@@ -0,0 +1,66 @@
+"""
+Per-stage latency of model_ensemble.ensemble_scores for filters of growing selectivity.
+
+Drives the shipped pipeline (result cache off): the attribute filters are resolved to
+candidate rows first ('plan'), CF and CBF score the whole catalog once per distinct input
+and are memoized (score_cache.py), and only the candidates are combined and ranked. Each
+query runs cold, with the score cache and the LLM cache cleared before every call, and
+warm, with the model vectors already cached as for a repeated submission. The LLM is the
+local fake endpoint of fake_openai.py answering at once, so no request leaves the machine.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_query_planner.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+STAGES = ["plan", "cf", "cbf", "llm", "combine", "top_n"]
+
+queries = {
+    "no filters": {},
+    "sidebar typical": {'game_weight': [1.5, 3.5], 'players': [2, 5], 'play_time': [30, 90],
+                        'min_rating': [6.5], 'year_published': [2010, 2025]},
+    "selective": {'game_categories': ['Abstract / Strategy'], 'game_weight': [1.5, 2.8],
+                  'players': [2, 5], 'min_rating': [7.5], 'year_published': [1999, 2025]},
+}
+
+
+def median_stages(model_ensemble, llm, liked, attributes, cold, n_calls=30):
+    runs = []
+    for _ in range(n_calls):
+        if cold:
+            model_ensemble.get_score_cache().clear()
+            llm.get_llm_cache().clear()
+        timings = {}
+        model_ensemble.ensemble_scores(liked, [], [], attributes, "", n_recommendations=5, timings=timings,
+                                       use_cache=False, text_scorer="llm")
+        runs.append([timings.get(stage, 0.0) for stage in STAGES])
+    return np.median(runs, axis=0)
+
+
+if __name__ == "__main__":
+    server = serve()
+    FakeOpenAI.reset()
+    # no persistent LLM cache, the run must not depend on earlier ones
+    os.environ["LLM_CACHE_DIR"] = ""
+
+    import llm
+    import model_ensemble
+    from cf import get_cf_engine
+
+    engine = get_cf_engine()
+    liked = list(engine.item_ids[np.random.default_rng(0).choice(engine.n_items, 8, replace=False)])
+
+    print(f"{'query':<16} {'cache':<6} {'rows':>6} " + " ".join(f"{s:>8}" for s in STAGES) + "  (ms)")
+    for name, attributes in queries.items():
+        n_rows = len(model_ensemble.plan_candidates(attributes, liked))
+        for label, cold in [("cold", True), ("warm", False)]:
+            stages = median_stages(model_ensemble, llm, liked, attributes, cold)
+            print(f"{name:<16} {label:<6} {n_rows:6,} " + " ".join(f"{v:8.3f}" for v in stages))
+    server.shutdown()
@@ -0,0 +1,92 @@
+"""
+Effect of the result cache (result_cache.py) on a replayed sidebar session.
+
+A session re-submits a handful of sidebar settings, often with the same selections in a
+different order, a stray space in the description or ints instead of floats, as the
+Streamlit widgets produce. Every query goes through model_ensemble.ensemble_scores with
+its in-memory result cache; a miss runs the shipped pipeline (filters, CF, CBF and the
+LLM, whose score vectors are memoized too). The LLM is the local fake endpoint of
+fake_openai.py, answering after --delay seconds in place of the gpt-4o-mini round trip.
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_result_cache.py [--queries 200] [--delay 0.3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+BASE_QUERIES = [
+    {"attributes": {"game_weight": [1.5, 3.5], "players": [2, 5], "min_rating": [6.5]},
+     "description": "a tense two player duel"},
+    {"attributes": {"game_categories": ["Abstract / Strategy", "Animals / Nature"], "players": [2, 4]},
+     "description": "relaxing family game"},
+    {"attributes": {"game_mechanics": ["Team Play", "Worker Placement"], "play_time": [30, 90]},
+     "description": ""},
+    {"attributes": {"year_published": [2010, 2025], "game_weight": [2, 4]},
+     "description": "heavy euro with engine building"},
+]
+
+
+def variant(query, rng):
+    """The same query as a widget might re-send it."""
+    attributes = {}
+    for name, value in query["attributes"].items():
+        if all(isinstance(v, str) for v in value):
+            value = list(rng.permutation(value))
+        elif rng.random() < 0.5:
+            value = [float(v) for v in value]
+        attributes[name] = value
+    if rng.random() < 0.3:
+        attributes["game_types"] = []
+    description = query["description"] + (" " if rng.random() < 0.5 else "")
+    return attributes, description
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.3, help="seconds the fake LLM takes per call")
+    args = parser.parse_args()
+
+    server = serve()
+    FakeOpenAI.reset(delay=args.delay)
+    # no persistent LLM cache, the run must not depend on earlier ones
+    os.environ["LLM_CACHE_DIR"] = ""
+
+    import model_ensemble
+    from cf import get_cf_engine
+
+    engine = get_cf_engine()
+    rng = np.random.default_rng(0)
+    liked_sets = [list(engine.item_ids[rng.choice(engine.n_items, 6, replace=False)]) for _ in range(3)]
+
+    cache = model_ensemble.get_result_cache()
+    cache.clear()
+    hit_ms, miss_ms = [], []
+    for _ in range(args.queries):
+        query = BASE_QUERIES[rng.integers(len(BASE_QUERIES))]
+        liked = list(rng.permutation(liked_sets[rng.integers(len(liked_sets))]))
+        attributes, description = variant(query, rng)
+
+        timings = {}
+        t0 = time.perf_counter()
+        model_ensemble.ensemble_scores(liked, [], [], attributes, description, n_recommendations=10,
+                                       timings=timings, text_scorer="llm")
+        # only a result cache hit reports nothing but 'cache'
+        (hit_ms if "cache" in timings else miss_ms).append((time.perf_counter() - t0) * 1000)
+    server.shutdown()
+
+    stats = cache.stats()
+    print(f"{args.queries} queries, {len(BASE_QUERIES) * len(liked_sets)} distinct: "
+          f"hit rate {stats['hit_rate']:.1%} ({stats['memory_hits']} hits, {stats['misses']} misses)")
+    # later misses reuse memoized model vectors, the first ones wait for the LLM
+    print(f"miss (ensemble_scores)  median {np.median(miss_ms):9.3f} ms, max {np.max(miss_ms):9.3f} ms")
+    print(f"hit  (key + lookup)     median {np.median(hit_ms):9.3f} ms")
+    print(f"LLM requests sent: {FakeOpenAI.requests} for {stats['misses']} misses")
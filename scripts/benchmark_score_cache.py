@@ -0,0 +1,74 @@
+"""
+Per-component score memoization (score_cache.py) over a sidebar session.
+
+Replays the edits a user makes between submissions (moving the complexity slider,
+toggling a category, liking another game, editing the description) through
+model_ensemble.ensemble_scores, with its result cache off, and reports which model
+vectors had to be recomputed, with the CF and CBF stage latency per submission. The LLM
+is the local fake endpoint of fake_openai.py, so a recomputed LLM vector is one
+get_llm_scores call whose requests are counted instead of paid for. Its key is the
+description plus the candidate pool (llm.candidate_pool).
+
+Run from the project root after pre_compute_CBF_data.py:
+    python scripts/benchmark_score_cache.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+COMPONENTS = ["cf", "cbf", "llm"]
+
+# liked games are rows of the CF model
+SESSION = [
+    ("first submit", [0, 10], {"game_weight": [1.5, 3.5], "players": [2, 4]}, "cooperative adventure"),
+    ("move complexity", [0, 10], {"game_weight": [2.0, 3.5], "players": [2, 4]}, "cooperative adventure"),
+    ("move complexity", [0, 10], {"game_weight": [2.5, 4.0], "players": [2, 4]}, "cooperative adventure"),
+    ("add category", [0, 10], {"game_weight": [2.5, 4.0], "players": [2, 4],
+                               "game_categories": ["Fantasy"]}, "cooperative adventure"),
+    ("like a game", [0, 10, 20], {"game_weight": [2.5, 4.0], "players": [2, 4],
+                                  "game_categories": ["Fantasy"]}, "cooperative adventure"),
+    ("edit description", [0, 10, 20], {"game_weight": [2.5, 4.0], "players": [2, 4],
+                                       "game_categories": ["Fantasy"]}, "cooperative dungeon crawl"),
+    ("back to start", [0, 10], {"game_weight": [1.5, 3.5], "players": [2, 4]}, "cooperative adventure"),
+]
+
+
+def misses(cache):
+    stats = cache.stats()
+    return {c: stats.get(c, {}).get("misses", 0) for c in COMPONENTS}
+
+
+if __name__ == "__main__":
+    server = serve()
+    FakeOpenAI.reset()
+    # no persistent LLM cache: every recomputed LLM vector reaches the fake endpoint
+    os.environ["LLM_CACHE_DIR"] = ""
+
+    import llm
+    import model_ensemble
+    from cf import get_cf_engine
+
+    engine = get_cf_engine()
+    cache = model_ensemble.get_score_cache()
+    cache.clear()
+    llm.get_llm_cache().clear()
+
+    print(f"{'edit':<18} {'recomputed':<14} {'cf ms':>7} {'cbf ms':>7} {'llm requests':>12}")
+    for edit, liked_rows, attributes, description in SESSION:
+        liked = [int(i) for i in engine.item_ids[liked_rows]]
+        before, requests = misses(cache), FakeOpenAI.requests
+        timings = {}
+        model_ensemble.ensemble_scores(liked, [], [], attributes, description, n_recommendations=10,
+                                       timings=timings, use_cache=False, text_scorer="llm")
+        after = misses(cache)
+        recomputed = [c for c in COMPONENTS if after[c] > before[c]]
+        print(f"{edit:<18} {','.join(recomputed) or '-':<14} {timings['cf']:7.3f} {timings['cbf']:7.3f} "
+              f"{FakeOpenAI.requests - requests:12d}")
+    server.shutdown()
+
+    stats = cache.stats()
+    print(f"\nLLM calls: {stats['llm']['misses']} of {len(SESSION)} submissions ({FakeOpenAI.requests} requests),"
+          f" {stats['entries']} vectors, {stats['bytes'] / 2**20:.1f} MiB")
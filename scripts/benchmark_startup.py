@@ -0,0 +1,85 @@
+"""
+Startup time and memory of loading the game catalog: the three independent parses of
+games_master_data.csv (model_ensemble, llm with the descriptions merge, app assets) against
+the shared catalog.get_games() table they now read from.
+
+Each variant runs in a fresh interpreter so peak RSS is measured in isolation.
+Run from the project root:
+    python scripts/benchmark_startup.py
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+GAMES_FILE = "./data/games_master_data.csv"
+DESCRIPTIONS_FILE = "./data/game_descriptions.csv"
+APP_COLUMNS = ["bgg_id", "thumbnail", "image", "ImagePath", "bgg_link", "players_min",
+               "players_max", "time_min", "time_max", "time_avg", "description", "full_description"]
+
+
+def semicolon_to_list(value):
+    if not isinstance(value, str):
+        return []
+    return [item.strip() for item in value.split(';') if item.strip()]
+
+
+def load_separate():
+    """The three parses as model_ensemble, llm and app ran them before the shared loader."""
+    label_columns = ['simple_game_mechanics', 'simple_game_categories', 'game_types']
+    ensemble_df = pd.read_csv(
+        GAMES_FILE,
+        usecols=['bgg_id', 'name', 'description', 'image', 'thumbnail', 'bgg_link', 'avg_rating',
+                 'bgg_rating', 'users_rated', 'game_weight', 'players_min', 'players_max',
+                 'players_best', 'time_min', 'time_max', 'time_avg', 'year_published'] + label_columns,
+        converters={col: semicolon_to_list for col in label_columns},
+    )
+
+    llm_df = pd.read_csv(GAMES_FILE, encoding="utf-8-sig")
+    for col in ['game_categories', 'game_mechanics'] + label_columns:
+        llm_df[col] = llm_df[col].apply(semicolon_to_list)
+    desc_df = pd.read_csv(DESCRIPTIONS_FILE, encoding="utf-8-sig")
+    merged_df = pd.merge(llm_df, desc_df, on="bgg_id", how="inner")
+
+    app_df = pd.read_csv(GAMES_FILE, usecols=lambda column: column in APP_COLUMNS)
+    return ensemble_df, llm_df, merged_df, app_df
+
+
+def load_shared():
+    """What the same three consumers do now."""
+    from catalog import get_catalog, get_descriptions, get_games
+
+    catalog = get_catalog(artifact_dir=None)
+    games = catalog.align(get_games())
+    layout = catalog.layout("descriptions", get_descriptions()["bgg_id"], complete=False)
+    has_description = layout.artifact_rows >= 0
+    merged_df = games.loc[has_description, ["bgg_id", "name", "year_published",
+                                            "description", "avg_rating"]].reset_index(drop=True)
+    app_df = games[[column for column in APP_COLUMNS if column in games.columns]].reset_index(drop=True)
+    return games, merged_df, app_df
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        loader = {"separate": load_separate, "shared": load_shared}[sys.argv[1]]
+        rss_before = current_rss_mb()
+        t0 = time.perf_counter()
+        frames = loader()
+        elapsed = time.perf_counter() - t0
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{sys.argv[1]:<10} {elapsed:7.2f} s | RSS +{current_rss_mb() - rss_before:6.0f} MiB"
+              f" | peak RSS {peak_mb:6.0f} MiB")
+        sys.exit(0)
+
+    for variant in ["separate", "shared"]:
+        subprocess.run([sys.executable, os.path.abspath(__file__), variant], check=True)
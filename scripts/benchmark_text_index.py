@@ -0,0 +1,85 @@
+"""
+LLM candidate pools chosen by description retrieval (text_index.py) against the
+best-rated pool, for a set of user descriptions.
+
+For each description both pools go through llm.get_llm_scores against the local fake
+endpoint of fake_openai.py (0.5 s + 0.04 s per game by default, chunked as in the app).
+Reported per pool: games, prompt tokens (characters / 4), the wall time of the LLM stage,
+the BM25 query time, and, as a lexical relevance proxy, how many of the pool's games
+mention every indexed word of the description in their full description. There are no
+relevance labels in the data, so the proxy only shows that the pool follows the text.
+
+Run from the project root after pre_compute_CBF_data.py (and build_text_index.py):
+    python scripts/benchmark_text_index.py [--delay 0.5] [--per-game 0.04]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_openai import FakeOpenAI, serve
+
+DESCRIPTIONS = [
+    "cooperative fantasy adventure with heroes and dungeons",
+    "economic trading game with trains and routes",
+    "a light party game with cards for a big family",
+    "space war game with dice",
+    "zombies survival cooperative",
+]
+ATTRIBUTES = {"players": [2, 4]}
+
+
+def matching_games(index, index_rows, pool, description):
+    """Pool games whose full description contains every indexed term of the description."""
+    terms = index.query_terms(description)
+    rows = index_rows[pool["bgg_id"].to_numpy()]
+    rows = rows[rows >= 0]
+    hits = np.ones(len(rows), dtype=bool)
+    for t in terms:
+        docs = index.docs[index.indptr[t]:index.indptr[t + 1]]
+        hits &= np.isin(rows, docs)
+    return int(hits.sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds per request before the first row")
+    parser.add_argument("--per-game", type=float, default=0.04, help="seconds per game in the prompt")
+    args = parser.parse_args()
+
+    server = serve()
+    import llm
+    from text_index import get_text_index
+
+    index = get_text_index()
+    # bgg_id -> document position in the index
+    index_rows = np.full(int(index.doc_ids.max()) + 1, -1, dtype=np.int64)
+    index_rows[index.doc_ids] = np.arange(index.n_docs)
+
+    print(f"{'description':<40} {'pool':<9} {'games':>5} {'~tokens':>8} {'LLM s':>6} {'query ms':>8} {'matching':>8}")
+    totals = {"rating": np.zeros(3), "retrieval": np.zeros(3)}
+    for description in DESCRIPTIONS:
+        for name, retrieval in [("rating", False), ("retrieval", True)]:
+            llm.LLM_RETRIEVAL = retrieval
+            t0 = time.perf_counter()
+            pool = llm.candidate_pool(ATTRIBUTES, description=description)
+            query_ms = (time.perf_counter() - t0) * 1000
+            FakeOpenAI.reset(delay=args.delay, per_game=args.per_game)
+            t0 = time.perf_counter()
+            llm.get_llm_scores(description, candidate_games=pool, use_cache=False)
+            llm_s = time.perf_counter() - t0
+            tokens = FakeOpenAI.prompt_chars / 4
+            matching = matching_games(index, index_rows, pool, description)
+            totals[name] += [tokens, llm_s, matching / max(len(pool), 1)]
+            print(f"{description[:40]:<40} {name:<9} {len(pool):5d} {tokens:8.0f} {llm_s:6.2f} {query_ms:8.1f} "
+                  f"{matching:4d} ({matching / max(len(pool), 1):.0%})")
+
+    (rating_tokens, rating_s, rating_share), (tokens, llm_s, share) = totals["rating"], totals["retrieval"]
+    n = len(DESCRIPTIONS)
+    print(f"\nretrieval pool: {tokens / rating_tokens:.0%} of the prompt tokens, LLM stage "
+          f"{llm_s / n:.2f} s vs {rating_s / n:.2f} s, matching games {share / n:.0%} vs {rating_share / n:.0%}")
+    server.shutdown()
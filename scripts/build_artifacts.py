@@ -0,0 +1,49 @@
+"""
+Build the memory-mapped model artifacts in data/artifacts/.
+
+Writes the CF factors (float32 and int8), the CF ANN index if it was built and the
+catalog row order (catalog.bgg_id, read by catalog.get_catalog) as raw .npy files plus
+manifest.json. The CBF arrays are written to the same directory by pre_compute_CBF_data.py.
+The app maps these read-only at startup instead of decompressing or unpickling.
+Run from the project root (optionally after build_cf_index.py):
+    python scripts/build_artifacts.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from artifacts import ARTIFACT_DIR, save_arrays
+from cf import load_item_ids, load_quantized_factors, MODEL_PATH, GAMES_PATH
+from cf_index import INDEX_PATH
+from columnar import read_table
+
+CATALOG_PATH = "data/games_master_data.csv"
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+
+    # --- CF ---
+    V_q, scale = load_quantized_factors(MODEL_PATH)
+    save_arrays({
+        "cf.V_q": V_q,
+        "cf.V": V_q.astype(np.float32) / 127 * np.float32(scale),
+        "cf.item_ids": load_item_ids(GAMES_PATH),
+    }, meta={"cf.scale": scale})
+    if os.path.exists(INDEX_PATH):
+        index = np.load(INDEX_PATH)
+        save_arrays({f"cf_index.{name}": index[name] for name in index.files})
+
+    # --- Catalog ---
+    # only the row order; the columns themselves come from the csv or its Parquet copy
+    catalog = read_table(CATALOG_PATH, columns=["bgg_id"])
+    save_arrays({"catalog.bgg_id": catalog["bgg_id"].to_numpy(dtype=np.int64)})
+
+    size_mb = sum(
+        os.path.getsize(os.path.join(ARTIFACT_DIR, f)) for f in os.listdir(ARTIFACT_DIR)
+    ) / 2**20
+    print(f"Artifacts written to '{ARTIFACT_DIR}' ({size_mb:.1f} MiB) in {time.perf_counter() - t0:.1f} s.")
@@ -0,0 +1,29 @@
+"""
+Build the IVF approximate nearest-neighbour index over the CF item factors.
+
+Writes data/V_final_ivf.npz next to V_final_quantized.npz; get_cf_engine() loads it
+automatically when present. Run from the project root:
+    python scripts/build_cf_index.py [n_lists]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import load_item_factors, MODEL_PATH
+from cf_index import IVFIndex, INDEX_PATH
+
+
+if __name__ == "__main__":
+    n_lists = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+
+    V = load_item_factors(MODEL_PATH)
+    t0 = time.perf_counter()
+    index = IVFIndex.build(V, n_lists=n_lists)
+    index.save(INDEX_PATH)
+
+    sizes = index.list_offsets[1:] - index.list_offsets[:-1]
+    print(f"Built {n_lists} lists over {len(V)} items in {time.perf_counter() - t0:.1f} s "
+          f"(list size min/mean/max: {sizes.min()}/{int(sizes.mean())}/{sizes.max()})")
+    print(f"Saved index to '{INDEX_PATH}'.")
@@ -0,0 +1,102 @@
+"""
+Convert the data csvs into columnar Parquet files in data/columnar/.
+
+Every column gets the narrowest lossless integer dtype, string columns with many repeated
+values (usernames, links shared by many rows) are dictionary-encoded, and the
+semicolon-separated label columns are stored pre-split as lists. columnar.read_table()
+then reads only the columns a loader asks for, without parsing text.
+user_ratings.csv is converted in chunks, so it never has to fit in memory whole.
+Run from the project root:
+    python scripts/build_columnar.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from columnar import COLUMNAR_DIR, columnar_path, semicolon_to_list
+
+DATA_DIR = "data"
+LABEL_COLUMNS = ['game_categories', 'simple_game_categories', 'game_mechanics',
+                 'simple_game_mechanics', 'game_types']
+
+# csv -> (label columns, explicit dtypes); other columns are downcast automatically
+TABLES = {
+    "games_master_data.csv": (LABEL_COLUMNS, {}),
+    "games.csv": ([], {}),
+    "game_descriptions.csv": ([], {}),
+    "user_ratings.csv": ([], {"BGGId": "int32", "Rating": "float32", "Username": "category"}),
+}
+CHUNKED_TABLES = {"user_ratings.csv"}
+# dictionary-encode string columns with at most this many distinct values per row
+MAX_DICTIONARY_RATIO = 0.5
+
+
+def compact(df, list_columns, dtype):
+    """Narrow integer dtypes, categorical repeated strings, label columns split into lists."""
+    df = df.copy()
+    for col in df.columns:
+        if col in list_columns:
+            df[col] = df[col].map(semicolon_to_list)
+        elif col in dtype:
+            df[col] = df[col].astype(dtype[col])
+        elif df[col].dtype.kind == "i":
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif df[col].dtype == object and len(df) and df[col].nunique() <= MAX_DICTIONARY_RATIO * len(df):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def to_arrow(df, schema=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table if schema is None else table.cast(schema)
+
+
+def stable_schema(schema):
+    """Schema with int32 dictionary indices, so every chunk of a table casts to it."""
+    return pa.schema([
+        pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+        if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ])
+
+
+def convert(csv_path, out_path, list_columns, dtype, chunksize=None):
+    reader = pd.read_csv(csv_path, encoding="utf-8-sig", chunksize=chunksize)
+    chunks = reader if chunksize else [reader]
+    writer = None
+    n_rows = 0
+    try:
+        for chunk in chunks:
+            df = compact(chunk, list_columns, dtype)
+            if writer is None:
+                schema = stable_schema(to_arrow(df).schema)
+                writer = pq.ParquetWriter(out_path, schema, compression="zstd")
+            writer.write_table(to_arrow(df, schema))
+            n_rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+if __name__ == "__main__":
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    for file_name, (list_columns, dtype) in TABLES.items():
+        csv_path = os.path.join(DATA_DIR, file_name)
+        if not os.path.exists(csv_path):
+            print(f"{file_name:<24} missing, skipped")
+            continue
+        t0 = time.perf_counter()
+        out_path = columnar_path(csv_path, COLUMNAR_DIR)
+        chunksize = 1_000_000 if file_name in CHUNKED_TABLES else None
+        n_rows = convert(csv_path, out_path, list_columns, dtype, chunksize)
+        csv_mb = os.path.getsize(csv_path) / 2**20
+        parquet_mb = os.path.getsize(out_path) / 2**20
+        print(f"{file_name:<24} {n_rows:>10,} rows | csv {csv_mb:8.1f} MiB -> parquet {parquet_mb:8.1f} MiB"
+              f" | {time.perf_counter() - t0:6.1f} s")
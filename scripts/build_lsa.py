@@ -0,0 +1,48 @@
+"""
+Fit the LSA text model (TF-IDF + truncated SVD) over the full game descriptions.
+
+Writes data/description_lsa.npz (vocabulary, idf, SVD components and float32 unit-length
+description embeddings); lsa.get_lsa_model() loads it, and the app only needs numpy to
+score with it. Tokens come from text_index.tokenize, so the LSA and BM25 vocabularies
+agree. Runs fully offline. Run from the project root:
+    python scripts/build_lsa.py [n_components]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from catalog import get_descriptions
+from lsa import LSA_DIMENSIONS, LSA_PATH, LSAModel
+from text_index import tokenize
+
+
+if __name__ == "__main__":
+    n_components = int(sys.argv[1]) if len(sys.argv) > 1 else LSA_DIMENSIONS
+
+    t0 = time.perf_counter()
+    descriptions = get_descriptions()
+    texts = descriptions["full_description"].fillna("")
+    # tokenize() already lower-cases and drops stop words
+    vectorizer = TfidfVectorizer(tokenizer=tokenize, lowercase=False, token_pattern=None,
+                                 sublinear_tf=True, min_df=2, dtype=np.float32)
+    tfidf = vectorizer.fit_transform(texts)
+
+    n_components = min(n_components, tfidf.shape[1] - 1)
+    svd = TruncatedSVD(n_components=n_components, random_state=42)
+    embeddings = svd.fit_transform(tfidf).astype(np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+
+    model = LSAModel(vectorizer.get_feature_names_out(), vectorizer.idf_, svd.components_, embeddings,
+                     descriptions["bgg_id"].to_numpy(), sublinear_tf=True)
+    model.save(LSA_PATH)
+
+    print(f"Fitted {n_components} LSA dimensions over {tfidf.shape[0]} descriptions and {tfidf.shape[1]} terms "
+          f"in {time.perf_counter() - t0:.1f} s (explained variance {svd.explained_variance_ratio_.sum():.1%}).")
+    print(f"Saved model to '{LSA_PATH}' ({os.path.getsize(LSA_PATH) / 2**20:.1f} MiB).")
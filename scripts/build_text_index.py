@@ -0,0 +1,28 @@
+"""
+Build the BM25 index over the full game descriptions (data/game_descriptions.csv).
+
+Writes data/description_index.npz; llm.candidate_pool loads it through
+text_index.get_text_index() when it is newer than the csv (and otherwise builds one in
+memory on first use). Runs fully offline. Run from the project root:
+    python scripts/build_text_index.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from catalog import get_descriptions
+from text_index import INDEX_PATH, TextIndex
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    descriptions = get_descriptions()
+    index = TextIndex.build(descriptions["bgg_id"].to_numpy(), descriptions["full_description"])
+    index.save(INDEX_PATH)
+
+    df = index.indptr[1:] - index.indptr[:-1]
+    print(f"Indexed {index.n_docs} descriptions in {time.perf_counter() - t0:.1f} s: "
+          f"{len(index.vocab)} terms, {len(index.docs)} postings (median df {int(sorted(df)[len(df) // 2])}).")
+    print(f"Saved index to '{INDEX_PATH}' ({os.path.getsize(INDEX_PATH) / 2**20:.1f} MiB).")
@@ -0,0 +1,75 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, used by the LLM benchmarks.
+
+It answers /v1/chat/completions the way gpt-4o-mini does for llm.py (a Name,LLM_Score
+CSV over every 'Name: ...' of the prompt, with a fixed score per name) after an emulated
+latency of delay + per_game seconds per game named in the prompt, as output length grows
+with the candidates. Requests can be made to fail with an HTTP status, always or at a
+random rate. serve() starts it and points the llm module's clients at it through
+OPENAI_API_KEY/OPENAI_BASE_URL, so it must run before llm is imported.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """Chat completions handler; the class attributes set the behaviour and count the traffic."""
+    delay = 0.0
+    per_game = 0.0
+    status = 200
+    fail_rate = 0.0
+    requests = 0
+    prompt_chars = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAI.requests += 1
+        FakeOpenAI.prompt_chars += sum(len(m["content"]) for m in body["messages"])
+        prompt = body["messages"][-1]["content"]
+        names = re.findall(r"^\s*Name: (.*)$", prompt, flags=re.MULTILINE)
+        time.sleep(self.delay + self.per_game * len(names))
+        status = 500 if random.random() < self.fail_rate else self.status
+        if status != 200:
+            self.send_response(status)
+            self.end_headers()
+            return
+        rows = [f'"{name}",{int(hashlib.md5(name.encode()).hexdigest(), 16) % 100 / 100:.2f}'
+                for name in names]
+        content = "Name,LLM_Score\n" + "\n".join(rows)
+        payload = json.dumps({
+            "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls, **behaviour):
+        """Zero the counters and set delay/per_game/status/fail_rate (the rest back to defaults)."""
+        settings = {"delay": 0.0, "per_game": 0.0, "status": 200, "fail_rate": 0.0, **behaviour}
+        for name, value in settings.items():
+            setattr(cls, name, value)
+        cls.requests = cls.prompt_chars = 0
+
+
+def serve() -> ThreadingHTTPServer:
+    """Start the fake endpoint on a free local port and point OPENAI_BASE_URL at it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    return server
@@ -1,9 +1,18 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
+from scipy.sparse import csr_matrix, hstack
 from sklearn.preprocessing import MultiLabelBinarizer, MinMaxScaler
-import pickle
 import warnings
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from artifacts import ARTIFACT_DIR, content_hash, save_arrays
+from columnar import read_table
+
+# bump when the layout of the cbf.* arrays or meta changes; cbf.py refuses other versions
+CBF_SCHEMA_VERSION = 1
+
 warnings.filterwarnings('ignore')
 
 
@@ -25,7 +34,7 @@ def semicolon_to_list(value):
 
 
 # -----------------------------
-# Load CSV
+# Load games (Parquet copy when built, else csv)
 # -----------------------------
 games_file = "data/games_master_data.csv"
 
@@ -45,14 +54,10 @@ dtype_dict = {
     'time_max': 'int64', 'time_avg': 'int64'
 }
 
-games_df = pd.read_csv(
+games_df = read_table(
     games_file,
-    usecols=usecols,
-    converters={
-        'simple_game_mechanics': semicolon_to_list,
-        'simple_game_categories': semicolon_to_list,
-        'game_types': semicolon_to_list
-    },
+    columns=usecols,
+    list_columns=['simple_game_mechanics', 'simple_game_categories', 'game_types'],
     dtype=dtype_dict
 )
 
@@ -96,26 +101,46 @@ numeric_features = scaler.fit_transform(games_df[['game_weight', 'players_best',
 # -----------------------------
 # Combine features (weighted)
 # -----------------------------
-weighted_features = np.hstack([
-    cat_features * 1.5,
-    mech_features * 2.0,
-    type_features * 1.0,
-    numeric_features * 0.5
-])
+block_weights = {'categories': 1.5, 'mechanics': 2.0, 'types': 1.0, 'numeric': 0.5}
+
+# sparse CSR: the one-hot blocks are mostly zero, only the 3 numeric columns are dense
+weighted_features = hstack([
+    csr_matrix(cat_features) * block_weights['categories'],
+    csr_matrix(mech_features) * block_weights['mechanics'],
+    csr_matrix(type_features) * block_weights['types'],
+    csr_matrix(numeric_features * block_weights['numeric'])
+], format='csr', dtype=np.float32)
+weighted_features.eliminate_zeros()
+
+# row norms for cosine similarity, so scoring is one sparse matvec plus a division
+feature_norms = np.sqrt(np.asarray(weighted_features.multiply(weighted_features).sum(axis=1))).ravel()
+
 
 # -----------------------------
 # Save precomputed data
 # -----------------------------
-precompute_data = {
-    'games_df': games_df,
-    'mlb_game_categories': mlb_game_categories,
-    'mlb_game_mechanics': mlb_game_mechanics,
-    'mlb_game_types': mlb_game_types,
-    'scaler': scaler,
-    'weighted_features': weighted_features
+# plain arrays + JSON meta instead of a pickle: cbf.py encodes queries with the
+# vocabularies and scaler parameters directly and never imports sklearn objects
+arrays = {
+    'cbf.item_ids': games_df['bgg_id'].to_numpy(dtype=np.int64),
+    'cbf.vocab_categories': np.array(mlb_game_categories.classes_, dtype=str),
+    'cbf.vocab_mechanics': np.array(mlb_game_mechanics.classes_, dtype=str),
+    'cbf.vocab_types': np.array(mlb_game_types.classes_, dtype=str),
+    'cbf.numeric_min': scaler.min_.astype(np.float64),
+    'cbf.numeric_scale': scaler.scale_.astype(np.float64),
+    'cbf.data': weighted_features.data,
+    'cbf.indices': weighted_features.indices,
+    'cbf.indptr': weighted_features.indptr,
+    'cbf.n_features': np.array([weighted_features.shape[1]]),
+    'cbf.feature_norms': feature_norms,
+}
+meta = {
+    'cbf.schema_version': CBF_SCHEMA_VERSION,
+    'cbf.block_weights': block_weights,
+    'cbf.numeric_columns': ['game_weight', 'players_best', 'time_avg'],
 }
+meta['cbf.content_hash'] = content_hash(arrays, meta)
 
-with open('precomputed_CBF.pkl', 'wb') as f:
-    pickle.dump(precompute_data, f)
+save_arrays(arrays, ARTIFACT_DIR, meta=meta)
 
-print("Precomputed CBF data saved to 'precomputed_CBF.pkl'.")
+print(f"Precomputed CBF data saved to '{ARTIFACT_DIR}' (hash {meta['cbf.content_hash'][:12]}).")
@@ -0,0 +1,274 @@
+"""
+Offline implicit-ALS training for the CF model.
+
+Reproduces the final model of notebooks/cf.ipynb without loading user_ratings.csv whole
+and without the `implicit` package:
+  1. stream the ratings in chunks with downcast dtypes into a sparse user x game matrix
+     (columns follow the row order of data/games.csv, which is what cf.py expects)
+  2. BM25-weight it and turn it into confidences with the notebook's
+     build_confidence_matrix alpha/gamma scheme
+  3. fit implicit ALS with conjugate-gradient updates, blocks of users/items solved on a
+     thread pool
+  4. quantize the item factors and write data/V_final_quantized.npz
+
+Peak memory and wall time are reported per stage. Run from the project root:
+    python scripts/train_als.py [--factors 256 --iterations 25 ...]
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cf import load_item_ids, GAMES_PATH, MODEL_PATH
+from columnar import read_batches
+
+RATINGS_PATH = "data/user_ratings.csv"
+# bytes of per-block temporaries shared by all solver threads, see block_nnz_for
+BLOCK_MEMORY = 2**30
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+class StageTimer:
+    """Print wall time and peak RSS after each pipeline stage."""
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+
+    def __call__(self, stage):
+        now = time.perf_counter()
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"[{now - self.start:8.1f} s] {stage:<40} "
+              f"({now - self.last:6.1f} s, peak RSS {peak_mb:7.0f} MiB)", flush=True)
+        self.last = now
+
+
+# -----------------------------
+# Ratings -> sparse matrix
+# -----------------------------
+def read_ratings(ratings_path, item_ids, chunksize=1_000_000, min_user_ratings=5):
+    """
+    Stream the ratings (Parquet copy when built, else csv) into a (users, games) CSR
+    matrix of raw ratings.
+
+    Ratings of games that are not in item_ids are dropped, as are users with fewer
+    than min_user_ratings remaining ratings (the notebook's threshold).
+    """
+    col_of = np.full(item_ids.max() + 1, -1, dtype=np.int32)
+    col_of[item_ids] = np.arange(len(item_ids), dtype=np.int32)
+
+    user_index = {}
+    rows, cols, data = [], [], []
+    reader = read_batches(
+        ratings_path,
+        columns=["BGGId", "Rating", "Username"],
+        batch_size=chunksize,
+        dtype={"BGGId": "int32", "Rating": "float32", "Username": "category"},
+    )
+    for chunk in reader:
+        chunk = chunk.dropna()
+        game_ids = chunk["BGGId"].to_numpy()
+        known = game_ids <= item_ids.max()
+        chunk_cols = np.full(len(chunk), -1, dtype=np.int32)
+        chunk_cols[known] = col_of[game_ids[known]]
+        keep = chunk_cols >= 0
+
+        codes, uniques = pd.factorize(chunk["Username"])
+        global_ids = np.array(
+            [user_index.setdefault(u, len(user_index)) for u in uniques], dtype=np.int32
+        )
+        rows.append(global_ids[codes[keep]])
+        cols.append(chunk_cols[keep])
+        data.append(chunk["Rating"].to_numpy()[keep])
+
+    rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+    R = coo_matrix((data, (rows, cols)), shape=(len(user_index), len(item_ids))).tocsr()
+    del rows, cols, data
+
+    R.sum_duplicates()
+    active = np.diff(R.indptr) >= min_user_ratings
+    return R[active]
+
+
+# -----------------------------
+# Weighting (notebooks/cf.ipynb)
+# -----------------------------
+def bm25_weight(X, K1=1.2, B=0.75):
+    """BM25 re-weighting of a (users, items) matrix, as implicit.nearest_neighbours.bm25_weight."""
+    X = coo_matrix(X, dtype=np.float32)
+    N = float(X.shape[0])
+    idf = np.log(N) - np.log1p(np.bincount(X.col, minlength=X.shape[1]))
+
+    row_sums = np.ravel(X.sum(axis=1))
+    length_norm = (1.0 - B) + B * row_sums / row_sums.mean()
+
+    X.data = X.data * (K1 + 1.0) / (K1 * length_norm[X.row] + X.data) * idf[X.col]
+    return X.tocsr()
+
+
+def build_confidence_matrix(R, alpha=20, r_min=1, r_max=10, gamma=1.0):
+    R_scaled = R.copy().astype(np.float32)
+    R_scaled.data = np.clip((R_scaled.data - r_min) / (r_max - r_min), 0, 1)
+    if gamma != 1.0:
+        R_scaled.data = R_scaled.data ** gamma
+
+    C = R_scaled.tocsr()
+    C.data = 1 + alpha * C.data
+    return C
+
+
+# -----------------------------
+# Implicit ALS with conjugate gradient
+# -----------------------------
+def row_blocks(indptr, max_nnz):
+    """Split CSR rows into contiguous blocks of at most ~max_nnz stored entries."""
+    bounds = [0]
+    targets = np.arange(max_nnz, indptr[-1], max_nnz)
+    for row in np.searchsorted(indptr, targets):
+        if row > bounds[-1]:
+            bounds.append(int(row))
+    if bounds[-1] != len(indptr) - 1:
+        bounds.append(len(indptr) - 1)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def block_nnz_for(memory, factors, n_threads):
+    """
+    Stored entries per block that keep the solver threads within memory bytes: a block
+    holds two (nnz, factors) float32 arrays at a time, its rows of Y and the gathered
+    user vectors. A row with more entries still makes a block of its own.
+    """
+    return max(1, int(memory) // (2 * factors * np.dtype(np.float32).itemsize * n_threads))
+
+
+def cg_update_block(Cui, X, Y, YtY, start, stop, cg_steps):
+    """
+    Conjugate-gradient solve of (YtY + Y^T (C_u - I) Y) x_u = Y^T C_u p_u for rows start:stop.
+
+    Every user of the block runs its CG iterations in lockstep; X is updated in place.
+    """
+    lo, hi = Cui.indptr[start], Cui.indptr[stop]
+    indptr = Cui.indptr[start:stop + 1] - lo
+    indices = Cui.indices[lo:hi]
+    conf = Cui.data[lo:hi]
+    user_of = np.repeat(np.arange(stop - start), np.diff(indptr))
+
+    def weighted_sum(weights):
+        # sum over each user's games of weight * Y[i], without materializing (nnz, k)
+        return csr_matrix((weights, indices, indptr), shape=(stop - start, Y.shape[0])) @ Y
+
+    Y_i = Y[indices]
+    x = X[start:stop]
+    dots = np.einsum("ij,ij->i", Y_i, x[user_of])
+    r = -x @ YtY + weighted_sum(conf - (conf - 1) * dots)
+    p = r.copy()
+    rs_old = np.einsum("ij,ij->i", r, r)
+
+    for _ in range(cg_steps):
+        dots = np.einsum("ij,ij->i", Y_i, p[user_of])
+        Ap = p @ YtY + weighted_sum((conf - 1) * dots)
+        pAp = np.einsum("ij,ij->i", p, Ap)
+        step = np.divide(rs_old, pAp, out=np.zeros_like(rs_old), where=pAp > 1e-20)
+        x += step[:, None] * p
+        r -= step[:, None] * Ap
+        rs_new = np.einsum("ij,ij->i", r, r)
+        beta = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 1e-20)
+        p = r + beta[:, None] * p
+        rs_old = rs_new
+
+    X[start:stop] = x
+
+
+def als_cg_step(Cui, X, Y, regularization, cg_steps, executor, block_nnz):
+    """Update all rows of X with Y fixed."""
+    YtY = (Y.T @ Y + regularization * np.eye(Y.shape[1])).astype(np.float32)
+    futures = [
+        executor.submit(cg_update_block, Cui, X, Y, YtY, start, stop, cg_steps)
+        for start, stop in row_blocks(Cui.indptr, block_nnz)
+    ]
+    for future in futures:
+        future.result()
+
+
+def fit_implicit_als(C, factors=256, regularization=0.03, iterations=25, cg_steps=3,
+                     n_threads=None, block_nnz=None, block_memory=BLOCK_MEMORY, seed=42, timer=None):
+    """
+    Fit implicit ALS on a (users, items) confidence matrix.
+
+    Rows are solved in blocks of block_nnz stored entries, by default sized so the blocks
+    in flight take about block_memory bytes (block_nnz_for).
+
+    Returns
+    -------
+    (U, V)
+        float32 user and item factor matrices
+    """
+    rng = np.random.default_rng(seed)
+    U = (rng.random((C.shape[0], factors), dtype=np.float32) * 0.01)
+    V = (rng.random((C.shape[1], factors), dtype=np.float32) * 0.01)
+    Cui = C.tocsr().astype(np.float32)
+    Ciu = C.T.tocsr().astype(np.float32)
+
+    n_threads = n_threads or os.cpu_count()
+    if block_nnz is None:
+        block_nnz = block_nnz_for(block_memory, factors, n_threads)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for it in range(iterations):
+            als_cg_step(Cui, U, V, regularization, cg_steps, executor, block_nnz)
+            als_cg_step(Ciu, V, U, regularization, cg_steps, executor, block_nnz)
+            if timer:
+                timer(f"ALS iteration {it + 1}/{iterations}")
+    return U, V
+
+
+def quantize(V):
+    """Symmetric int8 quantization in the format cf.py loads (V ~= V_q / 127 * scale)."""
+    scale = np.float32(np.abs(V).max())
+    V_q = np.round(V / scale * 127).astype(np.int8)
+    return V_q, scale
+
+
+if __name__ == "__main__":
+    # defaults are the best parameters from the notebook's hyperparameter search
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ratings", default=RATINGS_PATH)
+    parser.add_argument("--games", default=GAMES_PATH)
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--factors", type=int, default=256)
+    parser.add_argument("--regularization", type=float, default=0.03)
+    parser.add_argument("--iterations", type=int, default=25)
+    parser.add_argument("--alpha", type=float, default=160)
+    parser.add_argument("--gamma", type=float, default=3.0)
+    parser.add_argument("--cg-steps", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--block-memory-mb", type=int, default=BLOCK_MEMORY // 2**20)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    item_ids = load_item_ids(args.games)
+    R = read_ratings(args.ratings, item_ids, chunksize=args.chunksize)
+    timer(f"read {R.nnz:,} ratings, {R.shape[0]:,} users")
+
+    C = build_confidence_matrix(bm25_weight(R), alpha=args.alpha, gamma=args.gamma)
+    del R
+    timer("BM25 + confidence matrix")
+
+    U, V = fit_implicit_als(C, factors=args.factors, regularization=args.regularization,
+                            iterations=args.iterations, cg_steps=args.cg_steps,
+                            n_threads=args.threads, block_memory=args.block_memory_mb * 2**20,
+                            timer=timer)
+
+    V_q, scale = quantize(V)
+    np.savez_compressed(args.output, V_q=V_q, scale=scale)
+    timer(f"saved {V_q.shape} factors to '{args.output}'")
@@ -3,8 +3,11 @@ import json
 from typing import Optional
 import streamlit as st
 import pandas as pd
-from openai import OpenAI
+from llm import client
 from model_ensemble import ensemble_scores
+from cf import CFSession, get_cf_engine
+from catalog import get_games
+from columnar import read_table
 
 # ========= COLOR PALETTE =========
 BACKGROUND_COLOR = "#12241C"         # Dark green for main background
@@ -22,7 +25,6 @@ BUTTON_COLOR = "#A4B465"               # Muted green for buttons
 PLACEHOLDER_TEXT = "rgba(60, 60, 60, 0.6)"  # Placeholder gray
 
 st.set_page_config(page_title="Board Game Recommender", layout="wide")
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 n_games = 5 
 
 # ========= CUSTOM CSS =========
@@ -249,9 +251,15 @@ st.markdown(
 st.markdown("---")
 
 # --- Load data ---
+# games.csv columns used for the game pickers and the card details
+GAME_DETAIL_COLUMNS = [
+    "BGGId", "Name", "Description", "MinPlayers", "MaxPlayers",
+    "ComMinPlaytime", "ComMaxPlaytime", "MfgPlaytime",
+]
+
 @st.cache_data
 def load_data():
-    return pd.read_csv("./data/games.csv")
+    return read_table("./data/games.csv", columns=GAME_DETAIL_COLUMNS)
 
 @st.cache_data
 def load_mechanics():
@@ -284,17 +292,15 @@ def load_master_assets():
         "description",
         "full_description",
     ]
-    master_df = pd.read_csv(
-        "./data/games_master_data.csv",
-        usecols=lambda column: column in cols,
-    )
+    games = get_games()
+    master_df = games[[column for column in cols if column in games.columns]].reset_index(drop=True)
     master_df["bgg_id"] = pd.to_numeric(master_df["bgg_id"], errors="coerce").astype("Int64")
     master_df.dropna(subset=["bgg_id"], inplace=True)
-    master_df["asset_url"] = (
-        master_df["thumbnail"]
-        .fillna(master_df["ImagePath"])
-        .fillna(master_df["image"])
-    )
+    asset_url = pd.Series(None, index=master_df.index, dtype="object")
+    for column in ("thumbnail", "ImagePath", "image"):
+        if column in master_df.columns:
+            asset_url = asset_url.fillna(master_df[column])
+    master_df["asset_url"] = asset_url
     master_df.dropna(subset=["asset_url"], inplace=True)
     description_series = pd.Series("", index=master_df.index, dtype="object")
     if "full_description" in master_df.columns:
@@ -439,6 +445,8 @@ if "search_context" not in st.session_state:
     st.session_state["search_context"] = {}
 if "game_insights" not in st.session_state:
     st.session_state["game_insights"] = {}
+if "cf_session" not in st.session_state:
+    st.session_state["cf_session"] = CFSession(get_cf_engine())
 
 
 def generate_recommendation_reason(context: dict, recommendations: pd.DataFrame) -> Optional[str]:
@@ -529,6 +537,10 @@ liked_games = st.sidebar.multiselect(
     options=sorted(games_df["Name"].dropna().tolist())
 )
 
+liked_game_ids = [] if not liked_games else games_df.loc[games_df["Name"].isin(liked_games), "BGGId"].tolist()
+# apply each edit of the liked games as a rank-one update of the session's CF state
+st.session_state["cf_session"].set_liked(liked_game_ids)
+
 disliked_games = st.sidebar.multiselect(
     "Exclude from Recommendation",
     options=sorted(games_df["Name"].dropna().tolist())
@@ -624,7 +636,7 @@ if selected_model:
     #with st.spinner(f"Generating recommendations (Model {selected_model}: α={alpha}, β={beta})..."):
     with st.spinner("Generating recommendations..."):
         recommendations = ensemble_scores(
-            liked_games=[] if not liked_games else games_df.loc[games_df["Name"].isin(liked_games), "BGGId"].tolist(),
+            liked_games=liked_game_ids,
             disliked_games=[] if not disliked_games else games_df.loc[games_df["Name"].isin(disliked_games), "BGGId"].tolist(),
             exclude_games=[],
             attributes=attributes,
@@ -632,6 +644,7 @@ if selected_model:
             n_recommendations=n_games,
             alpha=alpha,
             beta=beta,
+            cf_session=st.session_state["cf_session"],
         )
 
     if not isinstance(recommendations, pd.DataFrame):
@@ -657,6 +670,13 @@ if recommendations_df is None:
 elif isinstance(recommendations_df, pd.DataFrame) and recommendations_df.empty:
     st.warning("No recommendations found. Try adjusting your filters or description.")
 elif isinstance(recommendations_df, pd.DataFrame):
+    if recommendations_df.attrs.get("degraded", {}).get("llm"):
+        if recommendations_df.attrs.get("text_scorer") == "llm+lsa":
+            st.info("The description model did not answer in time; your description was matched "
+                    "with the local text model only. Submit again to include it.")
+        else:
+            st.info("The description model did not answer in time; these recommendations use your "
+                    "liked games and filters only. Submit again to include your description.")
     recommendations_df = recommendations_df.reset_index(drop=True)
     recommendations_df = recommendations_df.merge(
         master_assets, left_on="bgg_id", right_index=True, how="left", suffixes=("", "_asset")
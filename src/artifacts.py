@@ -0,0 +1,100 @@
+"""
+artifacts.py
+Uncompressed, memory-mapped model artifacts.
+Every array is stored as a raw little-endian .npy file and described in a small JSON
+manifest, so loading is an mmap instead of decompression or unpickling. Processes on the
+same host that map the same files share the page cache instead of holding private copies.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+ARTIFACT_DIR = "./data/artifacts"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def has_artifacts(artifact_dir: str = ARTIFACT_DIR) -> bool:
+    return os.path.exists(os.path.join(artifact_dir, MANIFEST_FILE))
+
+
+def save_arrays(arrays: Dict[str, np.ndarray], artifact_dir: str = ARTIFACT_DIR,
+                meta: Optional[dict] = None) -> None:
+    """
+    Write arrays as little-endian .npy files plus a manifest.
+
+    Names are dotted ("cf.V", "catalog.bgg_id"); arrays and meta are merged into an
+    existing manifest, so artifacts can be built by separate steps.
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    manifest = read_manifest(artifact_dir) if has_artifacts(artifact_dir) else {
+        "version": FORMAT_VERSION, "arrays": {}, "meta": {}
+    }
+
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise TypeError(f"'{name}' is an object array, only numeric arrays can be mapped")
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        file_name = name.replace(".", "__") + ".npy"
+        np.save(os.path.join(artifact_dir, file_name), array, allow_pickle=False)
+        manifest["arrays"][name] = {
+            "file": file_name,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+        }
+
+    manifest["meta"].update(meta or {})
+    with open(os.path.join(artifact_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(artifact_dir: str = ARTIFACT_DIR) -> dict:
+    with open(os.path.join(artifact_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Artifact format version {manifest.get('version')} in '{artifact_dir}', "
+            f"expected {FORMAT_VERSION}; rebuild with scripts/build_artifacts.py"
+        )
+    return manifest
+
+
+def load_arrays(prefix: str = "", artifact_dir: str = ARTIFACT_DIR,
+                mmap_mode: Optional[str] = "r") -> Dict[str, np.ndarray]:
+    """
+    Map every array whose name starts with prefix, keyed by the name without the prefix.
+
+    With the default mmap_mode="r" the arrays are read-only views of the page cache.
+    """
+    manifest = read_manifest(artifact_dir)
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        if not name.startswith(prefix):
+            continue
+        array = np.load(os.path.join(artifact_dir, entry["file"]), mmap_mode=mmap_mode,
+                        allow_pickle=False)
+        if list(array.shape) != entry["shape"] or array.dtype.str != entry["dtype"]:
+            raise ValueError(f"'{name}' does not match the manifest, rebuild the artifacts")
+        arrays[name[len(prefix):]] = array
+    return arrays
+
+
+def load_meta(artifact_dir: str = ARTIFACT_DIR) -> dict:
+    return read_manifest(artifact_dir)["meta"]
+
+
+def content_hash(arrays: Dict[str, np.ndarray], meta: Optional[dict] = None) -> str:
+    """SHA-256 over array names, dtypes, shapes and bytes (in name order) plus JSON meta."""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        digest.update(f"{name}|{array.dtype.str}|{array.shape}".encode("utf-8"))
+        digest.update(array.tobytes())
+    digest.update(json.dumps(meta or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,201 @@
+"""
+catalog.py
+Registry of the game catalog: one dense row index shared by every model and filter.
+Row r is the game with the r-th smallest BGGId. Each artifact that stores per-game rows in
+its own order (CF factors, CBF features, descriptions) registers its id array once and
+gets a checked permutation map between its rows and catalog rows.
+
+The game table itself (games_master_data.csv, or its Parquet copy from
+scripts/build_columnar.py) is read once per process on first use and shared, read-only, by
+the ensemble, the LLM scorer, the filters and the app. Its label columns (categories,
+mechanics, types) are not part of that frame; get_labels() holds them as integer-coded
+LabelColumns in the same row order.
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from artifacts import ARTIFACT_DIR, has_artifacts, load_arrays
+from columnar import LabelColumn, read_labeled_table, read_table
+
+CATALOG_PATH = "./data/games_master_data.csv"
+DESCRIPTIONS_PATH = "./data/game_descriptions.csv"
+
+# columns read by the ensemble, LLM scorer, filters and app (ImagePath and full_description
+# are optional, the loader skips them when the csv has none); the full category/mechanic
+# columns are not used by any model and are not loaded
+GAMES_COLUMNS = [
+    "bgg_id", "name", "description", "full_description", "image", "thumbnail", "ImagePath",
+    "bgg_link", "avg_rating", "bgg_rating", "users_rated", "game_weight", "players_min",
+    "players_max", "players_best", "time_min", "time_max", "time_avg", "year_published",
+]
+# semicolon-separated label columns, read as LabelColumns under their canonical names
+LIST_COLUMNS = {
+    "simple_game_categories": "game_categories",
+    "simple_game_mechanics": "game_mechanics",
+    "game_types": "game_types",
+}
+GAMES_DTYPES = {
+    "bgg_id": "int64", "avg_rating": "float64", "bgg_rating": "float64",
+    "users_rated": "int64", "game_weight": "float64", "players_min": "int64",
+    "players_max": "int64", "players_best": "float64", "time_min": "int64",
+    "time_max": "int64", "time_avg": "int64",
+}
+
+
+class ArtifactLayout:
+    """
+    Row order of one artifact relative to the catalog.
+
+    Parameters
+    ----------
+    name : str
+        artifact name, used in error messages
+    artifact_rows : array
+        artifact_rows[r] is the artifact row holding catalog row r, -1 if the artifact lacks it
+    """
+
+    def __init__(self, name, artifact_rows):
+        self.name = name
+        self.artifact_rows = np.asarray(artifact_rows, dtype=np.int64)
+        self.identity = bool(np.array_equal(self.artifact_rows, np.arange(len(self.artifact_rows))))
+
+    @property
+    def complete(self) -> bool:
+        return bool(np.all(self.artifact_rows >= 0))
+
+    def take(self, rows):
+        """Artifact rows for the given catalog rows (None means all games, and stays None)."""
+        if rows is None or self.identity:
+            return rows
+        return self.artifact_rows[rows]
+
+    def to_catalog(self, values, fill=0.0) -> np.ndarray:
+        """Reorder per-artifact-row values into catalog row order; missing games get fill."""
+        values = np.asarray(values)
+        if self.identity:
+            return values
+        present = self.artifact_rows >= 0
+        out = np.full(len(self.artifact_rows), fill, dtype=values.dtype)
+        out[present] = values[self.artifact_rows[present]]
+        return out
+
+
+class Catalog:
+    """
+    Sorted BGGIds of every game in the catalog.
+
+    Parameters
+    ----------
+    bgg_ids : array
+        catalog BGGIds in any order, must be unique
+    """
+
+    def __init__(self, bgg_ids):
+        bgg_ids = np.asarray(bgg_ids, dtype=np.int64)
+        self.bgg_ids = np.sort(bgg_ids)
+        if len(self.bgg_ids) > 1 and np.any(self.bgg_ids[1:] == self.bgg_ids[:-1]):
+            raise ValueError("Catalog BGGIds are not unique")
+        self._layouts: Dict[str, ArtifactLayout] = {}
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.bgg_ids)
+
+    def ids_to_rows(self, ids, missing: int = -1) -> np.ndarray:
+        """Catalog rows of the given BGGIds; unknown ids map to missing."""
+        ids = np.asarray(ids if ids is not None else [], dtype=np.int64).ravel()
+        if self.n_rows == 0:
+            return np.full(len(ids), missing, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.bgg_ids, ids), self.n_rows - 1)
+        return np.where(self.bgg_ids[rows] == ids, rows, missing)
+
+    def known_rows(self, ids) -> np.ndarray:
+        """Unique, sorted catalog rows of the given BGGIds, dropping unknown ids."""
+        rows = self.ids_to_rows(ids)
+        return np.unique(rows[rows >= 0])
+
+    def rows_to_ids(self, rows) -> np.ndarray:
+        return self.bgg_ids[rows]
+
+    def _artifact_rows(self, name, artifact_ids, complete) -> np.ndarray:
+        artifact_ids = np.asarray(artifact_ids, dtype=np.int64)
+        rows = self.ids_to_rows(artifact_ids)
+        if np.any(rows < 0):
+            raise ValueError(f"'{name}' has {int(np.sum(rows < 0))} BGGIds that are not in the catalog")
+        if len(np.unique(rows)) != len(rows):
+            raise ValueError(f"'{name}' has duplicate BGGIds")
+        if complete and len(rows) != self.n_rows:
+            raise ValueError(f"'{name}' covers {len(rows)} of {self.n_rows} catalog games")
+
+        artifact_rows = np.full(self.n_rows, -1, dtype=np.int64)
+        artifact_rows[rows] = np.arange(len(rows))
+        return artifact_rows
+
+    def layout(self, name: str, artifact_ids, complete: bool = True) -> ArtifactLayout:
+        """
+        Register (once per name) the row order of an artifact from its per-row BGGIds.
+
+        Raises ValueError if the artifact has duplicate or unknown ids, or, with
+        complete=True, does not cover every catalog game.
+        """
+        if name not in self._layouts:
+            self._layouts[name] = ArtifactLayout(name, self._artifact_rows(name, artifact_ids, complete))
+        return self._layouts[name]
+
+    def align(self, df: pd.DataFrame, id_column: str = "bgg_id") -> pd.DataFrame:
+        """Return df (one row per catalog game, any order) in catalog row order."""
+        ids = df[id_column].to_numpy(dtype=np.int64)
+        if np.array_equal(ids, self.bgg_ids):
+            return df
+        return df.iloc[self._artifact_rows(id_column, ids, complete=True)]
+
+
+def get_games(catalog_path: str = CATALOG_PATH) -> pd.DataFrame:
+    """
+    The game table, read once per process and sorted into catalog row order.
+
+    Indexed by bgg_id (kept as a column too); the label columns are in get_labels(). The
+    frame is shared by every caller, so treat it as read-only and copy before modifying.
+    """
+    # one cache key per path, however the caller passes it
+    return _load_games(catalog_path)[0]
+
+
+def get_labels(catalog_path: str = CATALOG_PATH) -> Dict[str, LabelColumn]:
+    """
+    Label columns of the game table ("game_categories", "game_mechanics", "game_types"), in
+    get_games() row order. Shared and read-only; use LabelColumn.rows() for display lists.
+    """
+    return _load_games(catalog_path)[1]
+
+
+@lru_cache(maxsize=None)
+def _load_games(catalog_path: str) -> Tuple[pd.DataFrame, Dict[str, LabelColumn]]:
+    games, labels = read_labeled_table(catalog_path, columns=GAMES_COLUMNS, label_columns=LIST_COLUMNS,
+                                       dtype=GAMES_DTYPES)
+    labels = {LIST_COLUMNS[name]: column for name, column in labels.items()}
+    if not games["bgg_id"].is_monotonic_increasing:
+        order = np.argsort(games["bgg_id"].to_numpy(), kind="stable")
+        games = games.iloc[order]
+        labels = {name: column.take(order) for name, column in labels.items()}
+    return games.set_index("bgg_id", drop=False), labels
+
+
+@lru_cache(maxsize=None)
+def get_descriptions(descriptions_path: str = DESCRIPTIONS_PATH) -> pd.DataFrame:
+    """Full game descriptions (bgg_id, full_description), read once per process; read-only."""
+    return read_table(descriptions_path, columns=["bgg_id", "full_description"])
+
+
+@lru_cache(maxsize=None)
+def get_catalog(catalog_path: str = CATALOG_PATH, artifact_dir: str = ARTIFACT_DIR) -> Catalog:
+    """Process-wide catalog, from the mapped artifacts when built, otherwise the csv."""
+    if artifact_dir and has_artifacts(artifact_dir):
+        arrays = load_arrays("catalog.", artifact_dir)
+        if "bgg_id" in arrays:
+            return Catalog(arrays["bgg_id"])
+    return Catalog(get_games(catalog_path)["bgg_id"].to_numpy())
@@ -1,21 +1,58 @@
 import numpy as np
-import pandas as pd
-import pickle
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
 import os
 
-# load precomputed CBF data
-base_dir = os.path.dirname(os.path.abspath(__file__))
-cbf_path = os.path.join(base_dir, "..", "data", "precomputed_CBF.pkl")
-with open(cbf_path, "rb") as f:
-    _cbf_data = pickle.load(f)
+from artifacts import has_artifacts, load_arrays, load_meta
+
+CBF_SCHEMA_VERSION = 1
 
-games_df = _cbf_data["games_df"]
-mlb_game_categories = _cbf_data["mlb_game_categories"]
-mlb_game_mechanics = _cbf_data["mlb_game_mechanics"]
-mlb_game_types = _cbf_data["mlb_game_types"]
-scaler = _cbf_data["scaler"]
-weighted_features = _cbf_data["weighted_features"]  # use this as the feature matrix
+# load precomputed CBF data (written by scripts/pre_compute_CBF_data.py)
+base_dir = os.path.dirname(os.path.abspath(__file__))
+artifact_dir = os.path.join(base_dir, "..", "data", "artifacts")
+if not has_artifacts(artifact_dir) or "cbf.schema_version" not in load_meta(artifact_dir):
+    raise FileNotFoundError(
+        f"No CBF artifacts in '{artifact_dir}', run scripts/pre_compute_CBF_data.py first"
+    )
+
+_cbf_meta = {k: v for k, v in load_meta(artifact_dir).items() if k.startswith("cbf.")}
+if _cbf_meta["cbf.schema_version"] != CBF_SCHEMA_VERSION:
+    raise ValueError(
+        f"CBF artifact schema {_cbf_meta['cbf.schema_version']} found, expected "
+        f"{CBF_SCHEMA_VERSION}; rerun scripts/pre_compute_CBF_data.py"
+    )
+content_hash = _cbf_meta["cbf.content_hash"]
+block_weights = _cbf_meta["cbf.block_weights"]
+
+_cbf_arrays = load_arrays("cbf.", artifact_dir)
+item_ids = _cbf_arrays["item_ids"]
+numeric_min = _cbf_arrays["numeric_min"]
+numeric_scale = _cbf_arrays["numeric_scale"]
+weighted_features = csr_matrix(  # use this as the feature matrix
+    (_cbf_arrays["data"], _cbf_arrays["indices"], _cbf_arrays["indptr"]),
+    shape=(len(_cbf_arrays["indptr"]) - 1, int(_cbf_arrays["n_features"][0])),
+    copy=False,
+)
+feature_norms = _cbf_arrays["feature_norms"]
+
+# label -> column lookup tables replacing the fitted MultiLabelBinarizers
+label_blocks = []
+_offset = 0
+for attr_name, block in [("game_categories", "categories"),
+                         ("game_mechanics", "mechanics"),
+                         ("game_types", "types")]:
+    vocab = _cbf_arrays[f"vocab_{block}"].tolist()
+    label_blocks.append((attr_name, _offset, {label: i for i, label in enumerate(vocab)},
+                         block_weights[block]))
+    _offset += len(vocab)
+numeric_offset = _offset
+
+
+def sparse_cosine(features, norms, query_vector):
+    """Cosine similarity of every row of a CSR matrix with one dense query vector."""
+    query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+    dots = features @ query_vector
+    denom = norms * np.linalg.norm(query_vector)
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
 
 # get mean value
 def mean_or_default(value, default):
@@ -25,42 +62,38 @@ def mean_or_default(value, default):
         return value
     return default
 
-# get CBF scores
-def get_cbf_scores(attributes: dict):
-
-    n_games = games_df.shape[0]
+# build the query vector of an attributes dict (matches weighted_features)
+def build_query_vector(attributes: dict) -> np.ndarray:
 
-    # Build query vectors
-    cat_vec = mlb_game_categories.transform(
-        [attributes.get('game_categories', [])]
-    ) if 'game_categories' in attributes else np.zeros((1, len(mlb_game_categories.classes_)))
+    attributes = attributes or {}
 
-    mech_vec = mlb_game_mechanics.transform(
-        [attributes.get('game_mechanics', [])]
-    ) if 'game_mechanics' in attributes else np.zeros((1, len(mlb_game_mechanics.classes_)))
+    # Labels outside the vocabulary are ignored
+    query_vector = np.zeros(weighted_features.shape[1], dtype=np.float32)
+    for attr_name, offset, lookup, weight in label_blocks:
+        for label in attributes.get(attr_name) or []:
+            col = lookup.get(label)
+            if col is not None:
+                query_vector[offset + col] = weight
 
-    type_vec = mlb_game_types.transform(
-        [attributes.get('game_types', [])]
-    ) if 'game_types' in attributes else np.zeros((1, len(mlb_game_types.classes_)))
-
-    # Numeric features
+    # Numeric features, min-max scaled like the training features
     game_weight_avg = mean_or_default(attributes.get('game_weight'), 2.5)
     players_avg = mean_or_default(attributes.get('players'), 3)
     play_time_avg = mean_or_default(attributes.get('play_time'), 90)
 
-    numeric_vec = np.array([[game_weight_avg, players_avg, play_time_avg]])
-    numeric_vec_scaled = scaler.transform(numeric_vec)
+    numeric_vec = np.array([game_weight_avg, players_avg, play_time_avg])
+    numeric_vec_scaled = numeric_vec * numeric_scale + numeric_min
+    query_vector[numeric_offset:] = numeric_vec_scaled * block_weights["numeric"]
+    return query_vector
+
+# raw cosine similarities (CBF row order) of a query vector with every game
+def get_cbf_raw_scores(query_vector):
+
+    return sparse_cosine(weighted_features, feature_norms, query_vector)
 
-    # Combine feature vector (match weighted_features)
-    query_vector = np.hstack([
-        cat_vec * 1.5,
-        mech_vec * 2.0,
-        type_vec * 1.0,
-        numeric_vec_scaled * 0.5
-    ])
+# get CBF scores
+def get_cbf_scores(attributes: dict):
 
-    # compute similarity
-    cbf_scores = cosine_similarity(query_vector, weighted_features).flatten()
+    cbf_scores = get_cbf_raw_scores(build_query_vector(attributes))
 
     # normalize
     if cbf_scores.max() > cbf_scores.min():
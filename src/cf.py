@@ -4,8 +4,20 @@ Collaborative Filtering model for board game recommendations.
 This module computes similarity based on user ratings.
 """
 
-import pandas as pd
+import os
+from functools import lru_cache
+from typing import Optional
+
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+from artifacts import ARTIFACT_DIR, has_artifacts, load_arrays, load_meta, read_manifest
+from cf_index import INDEX_PATH, IVFIndex
+from columnar import read_table
+
+MODEL_PATH = "./data/V_final_quantized.npz"
+GAMES_PATH = "./data/games.csv"
+
 
 def fold_in_implicit_user(V, liked_items, alpha=5, lambda_=0.03):
     """
@@ -23,10 +35,603 @@ def fold_in_implicit_user(V, liked_items, alpha=5, lambda_=0.03):
     
     return u_new
 
+
+def fold_in_implicit_user_gram(V_i, gram_factor, alpha=160):
+    """
+    Exact implicit-ALS fold-in for a user who liked the rows V_i.
+
+    Solves (V^T V + lambda I + alpha V_i^T V_i) u = (1 + alpha) V_i^T 1, i.e. the user step of
+    implicit ALS with confidence 1 + alpha on liked games and 1 on every other game. The
+    liked rows enter as a rank-|liked| (Woodbury) update of gram_factor, the precomputed
+    Cholesky factor of V^T V + lambda I, so a query costs O(k^2 |liked|) plus a
+    |liked| x |liked| Cholesky solve.
+    """
+    W = cho_solve(gram_factor, V_i.T)
+    z = (1 + alpha) * W.sum(axis=1)
+    if alpha == 0:
+        return z
+
+    S = np.eye(len(V_i)) / alpha + V_i @ W
+    return z - W @ cho_solve(cho_factor(S), V_i @ z)
+
+
+def to_ragged(liked_sets):
+    """
+    Convert a list of liked-item collections into CSR form.
+
+    Returns
+    -------
+    (offsets, items)
+        user u liked items[offsets[u]:offsets[u + 1]]
+    """
+    lengths = np.array([len(s) for s in liked_sets], dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] == 0:
+        return offsets, np.zeros(0, dtype=np.int64)
+    items = np.concatenate([np.asarray(s, dtype=np.int64).ravel() for s in liked_sets if len(s)])
+    return offsets, items
+
+
+def fold_in_implicit_users(V, offsets, liked_items, alpha=5, lambda_=0.03, batch_size=256,
+                           gram_inv=None):
+    """
+    Batched version of fold_in_implicit_user (or of fold_in_implicit_user_gram when
+    gram_inv is given) for many users at once.
+
+    The liked rows of V are scattered into a zero-padded (users, max_likes, k) block so that
+    every Gram system of a batch is built with one stacked matmul and solved with one
+    stacked np.linalg.solve. When users have fewer likes than factors the equivalent
+    (max_likes x max_likes) system u = c V_i^T (lambda I + c V_i V_i^T)^-1 1 is solved
+    instead of the k x k one, which is what makes large batches cheap.
+
+    Parameters
+    ----------
+    V : matrix
+        item embedding matrix
+    offsets, liked_items : array
+        CSR layout of the liked row indices, see to_ragged
+    batch_size : int
+        users solved per stacked call, bounds the (batch, k, k) working memory
+    gram_inv : matrix, optional
+        (V^T V + lambda I)^-1 of the full item matrix, switches to the exact implicit-ALS fold-in
+
+    Returns
+    -------
+    U
+        (users, k) matrix of user vectors, zero rows for users without likes
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    liked_items = np.asarray(liked_items, dtype=np.int64)
+    n_users, k = len(offsets) - 1, V.shape[1]
+    c = 1 + alpha
+
+    U = np.zeros((n_users, k))
+    for start in range(0, n_users, batch_size):
+        stop = min(start + batch_size, n_users)
+        lo, hi = offsets[start], offsets[stop]
+        lengths = np.diff(offsets[start:stop + 1])
+        if hi == lo:
+            continue
+
+        # position of each liked item inside its user's padded block
+        user_of = np.repeat(np.arange(stop - start), lengths)
+        slot = np.arange(hi - lo) - np.repeat(offsets[start:stop] - lo, lengths)
+
+        max_len = lengths.max()
+        V_pad = np.zeros((stop - start, max_len, k))
+        V_pad[user_of, slot] = V[liked_items[lo:hi]]
+
+        if gram_inv is not None:
+            # batched fold_in_implicit_user_gram; padded rows are zero and drop out
+            W = V_pad @ gram_inv
+            z = c * W.sum(axis=1)
+            if alpha == 0:
+                U[start:stop] = z
+                continue
+            S = V_pad @ W.transpose(0, 2, 1) + np.eye(max_len) / alpha
+            y = np.linalg.solve(S, (V_pad @ z[:, :, None]))
+            U[start:stop] = z - (W.transpose(0, 2, 1) @ y)[:, :, 0]
+        elif max_len < k:
+            # padded slots get a zero right-hand side, so their weights solve to zero
+            rhs = np.zeros((stop - start, max_len, 1))
+            rhs[user_of, slot] = 1
+            G = c * (V_pad @ V_pad.transpose(0, 2, 1)) + lambda_ * np.eye(max_len)
+            w = np.linalg.solve(G, rhs)
+            U[start:stop] = c * (V_pad.transpose(0, 2, 1) @ w)[:, :, 0]
+        else:
+            A = c * (V_pad.transpose(0, 2, 1) @ V_pad) + lambda_ * np.eye(k)
+            b = c * V_pad.sum(axis=1)
+            U[start:stop] = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+
+    return U
+
+
+def minmax_normalize(scores) -> np.ndarray:
+    """Scale scores to [0, 1], all zeros when they are constant or empty."""
+    if len(scores) == 0:
+        return np.zeros(0)
+    lo, hi = scores.min(), scores.max()
+    if hi > lo:
+        return (scores - lo) / (hi - lo)
+    return np.zeros_like(scores)
+
+
+def load_quantized_factors(model_path: str = MODEL_PATH):
+    """Load the int8 item embedding matrix and its scale, V ~= V_q / 127 * scale."""
+    data = np.load(model_path)
+    return data["V_q"], float(data["scale"])
+
+
+def load_item_factors(model_path: str = MODEL_PATH) -> np.ndarray:
+    """Load the quantized item embedding matrix and dequantize it to float32."""
+    V_q, scale = load_quantized_factors(model_path)
+    return V_q.astype(np.float32) / 127 * np.float32(scale)
+
+
+def load_item_ids(games_path: str = GAMES_PATH) -> np.ndarray:
+    """Load the BGGIds of the games, in the same row order as the item factors."""
+    return read_table(games_path, columns=["BGGId"])["BGGId"].to_numpy(dtype=np.int64)
+
+
+def _index_from_artifacts(artifact_dir: str) -> Optional[IVFIndex]:
+    arrays = load_arrays("cf_index.", artifact_dir)
+    return IVFIndex(**arrays) if arrays else None
+
+
+class CFEngine:
+    """
+    Long-lived CF scorer that keeps the item factors and the BGGId -> row index resident.
+
+    Parameters
+    ----------
+    V : matrix
+        item embedding matrix, one row per game
+    item_ids : array
+        BGGIds of the games, aligned with the rows of V
+    alpha, lambda_ : float
+        fold-in confidence weight and regularization, the defaults are the training values
+        from notebooks/cf.ipynb
+    index : IVFIndex, optional
+        approximate inner-product index over the rows of V, used by top_k_approx
+    use_gram : bool
+        exact implicit-ALS fold-in against the cached V^T V (fold_in_implicit_user_gram);
+        False uses the liked-rows-only fold_in_implicit_user
+    """
+
+    def __init__(self, V, item_ids, alpha=160, lambda_=0.03, index=None, use_gram=True):
+        self.V = np.ascontiguousarray(V, dtype=np.float32)
+        self._init_catalog(item_ids, alpha, lambda_, index, use_gram)
+
+    def _init_catalog(self, item_ids, alpha, lambda_, index, use_gram):
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        if self._n_factor_rows != len(self.item_ids):
+            raise ValueError(
+                f"V has {self._n_factor_rows} rows but {len(self.item_ids)} item ids were given"
+            )
+        self.alpha = alpha
+        self.lambda_ = lambda_
+        self.index = index
+
+        # dense BGGId -> row lookup, -1 for ids that are not in the catalog
+        self._row_of = np.full(self.item_ids.max() + 1, -1, dtype=np.int32)
+        self._row_of[self.item_ids] = np.arange(len(self.item_ids), dtype=np.int32)
+
+        self.use_gram = use_gram
+        if use_gram:
+            # V^T V + lambda I is the same for every user, factor it once
+            self.gram = self._gram()
+            self._gram_factor = cho_factor(self.gram + lambda_ * np.eye(len(self.gram)))
+            self._gram_inv = cho_solve(self._gram_factor, np.eye(len(self.gram)))
+
+    def _gram(self, block_rows=4096) -> np.ndarray:
+        """V^T V in float64, accumulated over row blocks."""
+        k = self.factor_rows(slice(0, 1)).shape[1]
+        gram = np.zeros((k, k))
+        for start in range(0, self._n_factor_rows, block_rows):
+            block = self.factor_rows(slice(start, start + block_rows)).astype(np.float64)
+            gram += block.T @ block
+        return gram
+
+    @classmethod
+    def from_files(cls, model_path: str = MODEL_PATH, games_path: str = GAMES_PATH,
+                   index_path: Optional[str] = None, **kwargs):
+        """Build an engine from the quantized npz and the games csv, plus the ANN index if it exists."""
+        index = IVFIndex.load(index_path) if index_path and os.path.exists(index_path) else None
+        return cls(load_item_factors(model_path), load_item_ids(games_path), index=index, **kwargs)
+
+    @classmethod
+    def from_artifacts(cls, artifact_dir: str = ARTIFACT_DIR, **kwargs):
+        """Build an engine on the memory-mapped arrays written by scripts/build_artifacts.py."""
+        arrays = load_arrays("cf.", artifact_dir)
+        return cls(arrays["V"], arrays["item_ids"], index=_index_from_artifacts(artifact_dir), **kwargs)
+
+    @property
+    def _n_factor_rows(self) -> int:
+        return self.V.shape[0]
+
+    @property
+    def n_items(self) -> int:
+        return len(self.item_ids)
+
+    def factor_rows(self, rows) -> np.ndarray:
+        """Float item vectors for the given rows."""
+        return self.V[rows]
+
+    def gathers(self, rows) -> bool:
+        """
+        Whether scoring only the given rows beats one full matvec: gathering rows costs
+        more per row than streaming V, the break-even is around a quarter of the catalog.
+        """
+        return rows is not None and len(rows) < self._n_factor_rows // 4
+
+    def item_scores(self, u, rows=None) -> np.ndarray:
+        """Raw inner products of u with every item vector, or with the given rows only."""
+        u = np.asarray(u, dtype=np.float32)
+        if rows is None:
+            return self.V.dot(u)
+        return self.V[rows].dot(u) if self.gathers(rows) else self.V.dot(u)[rows]
+
+    def item_scores_batch(self, U) -> np.ndarray:
+        """Raw (users, items) inner products for a block of user vectors."""
+        return U.astype(np.float32) @ self.V.T
+
+    def ids_to_rows(self, liked_ids) -> np.ndarray:
+        """Map BGGIds to row indices of V, dropping ids that are not in the catalog."""
+        ids = np.asarray(liked_ids if liked_ids is not None else [], dtype=np.int64).ravel()
+        ids = ids[(ids >= 0) & (ids < len(self._row_of))]
+        rows = self._row_of[ids]
+        return np.unique(rows[rows >= 0])
+
+    def user_vector(self, liked_ids) -> Optional[np.ndarray]:
+        """Fold the liked games into a user vector, or None if none of them are known."""
+        rows = self.ids_to_rows(liked_ids)
+        if len(rows) == 0:
+            return None
+        V_i = self.factor_rows(rows)
+        if self.use_gram:
+            return fold_in_implicit_user_gram(V_i.astype(np.float64), self._gram_factor, alpha=self.alpha)
+        return fold_in_implicit_user(V_i, liked_items=np.arange(len(rows)),
+                                     alpha=self.alpha, lambda_=self.lambda_)
+
+    def score(self, liked_ids) -> np.ndarray:
+        """
+        Score every game for a user who liked the given games.
+
+        Returns
+        -------
+        scores
+            array of scores per game normalized between 0 and 1, all zeros if no liked game is known
+        """
+        u = self.user_vector(liked_ids)
+        if u is None:
+            return np.zeros(self.n_items)
+        return minmax_normalize(self.item_scores(u))
+
+    def top_k(self, liked_ids, k: int = 10):
+        """
+        Return the BGGIds and scores of the k best games, excluding the liked games.
+
+        Returns
+        -------
+        (ids, scores)
+            arrays of length <= k sorted by descending score
+        """
+        liked_rows = self.ids_to_rows(liked_ids)
+        k = min(k, self.n_items)
+        if k <= 0 or len(liked_rows) == 0:
+            return self.item_ids[:0], np.zeros(0)
+
+        scores = self.score(liked_ids)
+        scores[liked_rows] = -np.inf
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return self.item_ids[top], scores[top]
+
+    def top_k_approx(self, liked_ids, k: int = 10, n_probe: int = 16):
+        """
+        Like top_k, but only scores the games in the n_probe closest index partitions.
+
+        Falls back to the exact top_k when no index is loaded. Scores are raw inner
+        products, since the min-max normalization would need every game's score.
+        """
+        if self.index is None:
+            return self.top_k(liked_ids, k)
+
+        u = self.user_vector(liked_ids)
+        if u is None or k <= 0:
+            return self.item_ids[:0], np.zeros(0)
+        rows = self.index.candidates(u.astype(np.float32), n_probe)
+        rows = rows[~np.isin(rows, self.ids_to_rows(liked_ids))]
+        if len(rows) == 0:
+            return self.item_ids[:0], np.zeros(0)
+
+        scores = self.item_scores(u, rows)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self.item_ids[rows[top]], scores[top]
+
+    def ragged_rows(self, offsets, liked_ids):
+        """Map CSR BGGIds to CSR row indices, dropping unknown and duplicate ids per user."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        ids = np.asarray(liked_ids, dtype=np.int64)
+        user_of = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+        known = (ids >= 0) & (ids < len(self._row_of))
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        rows[known] = self._row_of[ids[known]]
+        user_of, rows = user_of[rows >= 0], rows[rows >= 0]
+
+        order = np.lexsort((rows, user_of))
+        user_of, rows = user_of[order], rows[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (user_of[1:] != user_of[:-1]) | (rows[1:] != rows[:-1])
+        user_of, rows = user_of[first], rows[first]
+
+        new_offsets = np.zeros(len(offsets), dtype=np.int64)
+        np.cumsum(np.bincount(user_of, minlength=len(offsets) - 1), out=new_offsets[1:])
+        return new_offsets, rows
+
+    def _batch_scores(self, offsets, rows, batch_size):
+        """Yield (start, stop, normalized score block) for consecutive user batches."""
+        U = fold_in_implicit_users(self.factor_rows(rows), offsets, np.arange(len(rows)),
+                                   alpha=self.alpha, lambda_=self.lambda_, batch_size=batch_size,
+                                   gram_inv=self._gram_inv if self.use_gram else None)
+        has_likes = np.diff(offsets) > 0
+        for start in range(0, len(U), batch_size):
+            stop = min(start + batch_size, len(U))
+            scores = self.item_scores_batch(U[start:stop])
+
+            lo = scores.min(axis=1, keepdims=True)
+            span = scores.max(axis=1, keepdims=True) - lo
+            valid = (span > 0) & has_likes[start:stop, None]
+            scores = np.where(valid, (scores - lo) / np.where(valid, span, 1), 0).astype(np.float32)
+            yield start, stop, scores
+
+    def score_batch(self, offsets, liked_ids, batch_size: int = 256) -> np.ndarray:
+        """
+        Score every game for many users given as CSR (offsets, BGGIds).
+
+        Returns
+        -------
+        scores
+            (users, games) float32 matrix, each row normalized like score()
+        """
+        offsets, rows = self.ragged_rows(offsets, liked_ids)
+        out = np.zeros((len(offsets) - 1, self.n_items), dtype=np.float32)
+        for start, stop, scores in self._batch_scores(offsets, rows, batch_size):
+            out[start:stop] = scores
+        return out
+
+    def top_k_batch(self, offsets, liked_ids, k: int = 10, batch_size: int = 256):
+        """
+        Per-user top-k for many users given as CSR (offsets, BGGIds), excluding liked games.
+
+        Only one (batch_size, games) score block is held in memory at a time.
+
+        Returns
+        -------
+        (ids, scores)
+            (users, k) arrays sorted by descending score, id -1 / score 0 where a user has no likes
+        """
+        offsets, rows = self.ragged_rows(offsets, liked_ids)
+        n_users = len(offsets) - 1
+        k = min(k, self.n_items)
+        top_ids = np.full((n_users, k), -1, dtype=np.int64)
+        top_scores = np.zeros((n_users, k), dtype=np.float32)
+        has_likes = np.diff(offsets) > 0
+        if k <= 0:
+            return top_ids, top_scores
+
+        for start, stop, scores in self._batch_scores(offsets, rows, batch_size):
+            lo, hi = offsets[start], offsets[stop]
+            user_of = np.repeat(np.arange(stop - start), np.diff(offsets[start:stop + 1]))
+            scores[user_of, rows[lo:hi]] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_vals = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_vals, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+
+            live = has_likes[start:stop]
+            top_ids[start:stop][live] = self.item_ids[top[live]]
+            top_scores[start:stop][live] = np.take_along_axis(top_vals, order, axis=1)[live]
+        return top_ids, top_scores
+
+
+class QuantizedCFEngine(CFEngine):
+    """
+    CF scorer that keeps V as int8 (about 4x less resident memory than float32).
+
+    Only the liked rows are dequantized for the fold-in. For scoring the user vector is
+    quantized to int8 as well, the matvec accumulates in int32 and a single rescale
+    turns the result back into inner products.
+
+    Parameters
+    ----------
+    V_q : matrix
+        int8 item embedding matrix
+    scale : float
+        quantization scale, V ~= V_q / 127 * scale
+    """
+
+    def __init__(self, V_q, scale, item_ids, alpha=160, lambda_=0.03, index=None, use_gram=True):
+        self.V_q = np.ascontiguousarray(V_q, dtype=np.int8)
+        self.scale = float(scale)
+        self._init_catalog(item_ids, alpha, lambda_, index, use_gram)
+
+    @classmethod
+    def from_files(cls, model_path: str = MODEL_PATH, games_path: str = GAMES_PATH,
+                   index_path: Optional[str] = None, **kwargs):
+        """Build an engine from the quantized npz and the games csv, plus the ANN index if it exists."""
+        index = IVFIndex.load(index_path) if index_path and os.path.exists(index_path) else None
+        V_q, scale = load_quantized_factors(model_path)
+        return cls(V_q, scale, load_item_ids(games_path), index=index, **kwargs)
+
+    @classmethod
+    def from_artifacts(cls, artifact_dir: str = ARTIFACT_DIR, **kwargs):
+        arrays = load_arrays("cf.", artifact_dir)
+        return cls(arrays["V_q"], load_meta(artifact_dir)["cf.scale"], arrays["item_ids"],
+                   index=_index_from_artifacts(artifact_dir), **kwargs)
+
+    @property
+    def _n_factor_rows(self) -> int:
+        return self.V_q.shape[0]
+
+    def factor_rows(self, rows) -> np.ndarray:
+        return self.V_q[rows].astype(np.float32) * np.float32(self.scale / 127)
+
+    @staticmethod
+    def quantize(u):
+        """Symmetric int8 quantization of a vector (or of each row of a matrix)."""
+        u_scale = np.abs(u).max(axis=-1, keepdims=True) / 127
+        u_scale = np.where(u_scale > 0, u_scale, 1)
+        return np.round(u / u_scale).astype(np.int8), u_scale
+
+    def item_scores(self, u, rows=None) -> np.ndarray:
+        u_q, u_scale = self.quantize(u)
+        V_q = self.V_q[rows] if self.gathers(rows) else self.V_q
+        acc = np.einsum("ij,j->i", V_q, u_q, dtype=np.int32)
+        if rows is not None and not self.gathers(rows):
+            acc = acc[rows]
+        return acc * np.float32(u_scale[0] * self.scale / 127)
+
+    def item_scores_batch(self, U) -> np.ndarray:
+        # the block matmul runs through BLAS on float32 copies of the int8 codes; the
+        # codes are small integers, so float32 accumulation stays exact over k terms
+        U_q, u_scale = self.quantize(U)
+        acc = U_q.astype(np.float32) @ self.V_q.T.astype(np.float32)
+        return acc * (u_scale * self.scale / 127).astype(np.float32)
+
+
+class CFSession:
+    """
+    Per-session CF state for interactive editing of the liked games.
+
+    Keeps the inverse of the fold-in system A = A_0 + w V_i^T V_i and the right-hand side
+    b = (1 + alpha) V_i^T 1, where A_0 is the engine's V^T V + lambda I (or lambda I without
+    use_gram). Adding or removing a liked game is a Sherman-Morrison rank-one update or
+    downdate of A^-1, O(k^2) per edit instead of a fresh fold-in. Scores are only
+    recomputed when asked for after an edit.
+
+    Parameters
+    ----------
+    engine : CFEngine
+        shared engine providing the item factors
+    liked_ids : array
+        initial liked BGGIds
+    refresh_every : int
+        number of edits after which A^-1 is rebuilt from scratch to shed rounding drift
+    """
+
+    def __init__(self, engine, liked_ids=(), refresh_every=64):
+        self.engine = engine
+        self.refresh_every = refresh_every
+        k = engine.factor_rows(slice(0, 1)).shape[1]
+        if engine.use_gram:
+            self._weight = engine.alpha
+            self._base = engine.gram + engine.lambda_ * np.eye(k)
+            self._base_inv = engine._gram_inv
+        else:
+            self._weight = 1 + engine.alpha
+            self._base = engine.lambda_ * np.eye(k)
+            self._base_inv = np.eye(k) / engine.lambda_
+        self._reset()
+        self.set_liked(liked_ids)
+
+    def _reset(self):
+        self.liked_rows = set()
+        self._A_inv = self._base_inv.copy()
+        self._b = np.zeros(len(self._base_inv))
+        self._edits = 0
+        self._scores = None
+
+    def _rank_one(self, row, sign):
+        v = self.engine.factor_rows([row])[0].astype(np.float64)
+        Av = self._A_inv @ v
+        denom = 1 + sign * self._weight * (v @ Av)
+        self._A_inv -= (sign * self._weight / denom) * np.outer(Av, Av)
+        self._b += sign * (1 + self.engine.alpha) * v
+        self._edits += 1
+        self._scores = None
+
+    def _refresh(self):
+        rows = sorted(self.liked_rows)
+        V_i = self.engine.factor_rows(rows).astype(np.float64)
+        A = self._base + self._weight * V_i.T @ V_i
+        self._A_inv = cho_solve(cho_factor(A), np.eye(len(A)))
+        self._b = (1 + self.engine.alpha) * V_i.sum(axis=0)
+        self._edits = 0
+
+    def add(self, game_id):
+        """Add one liked game; unknown or already liked ids are ignored."""
+        rows = self.engine.ids_to_rows([game_id])
+        if len(rows) and rows[0] not in self.liked_rows:
+            self.liked_rows.add(int(rows[0]))
+            self._rank_one(rows[0], +1)
+            if self._edits >= self.refresh_every:
+                self._refresh()
+
+    def remove(self, game_id):
+        """Remove one liked game; ids that are not liked are ignored."""
+        rows = self.engine.ids_to_rows([game_id])
+        if len(rows) and rows[0] in self.liked_rows:
+            self.liked_rows.discard(int(rows[0]))
+            if not self.liked_rows:
+                self._reset()
+                return
+            self._rank_one(rows[0], -1)
+            if self._edits >= self.refresh_every:
+                self._refresh()
+
+    def set_liked(self, liked_ids):
+        """Apply only the difference between the current and the new liked games."""
+        new_rows = set(self.engine.ids_to_rows(liked_ids).tolist())
+        for row in self.liked_rows - new_rows:
+            self.remove(self.engine.item_ids[row])
+        for row in new_rows - self.liked_rows:
+            self.add(self.engine.item_ids[row])
+
+    def user_vector(self) -> Optional[np.ndarray]:
+        if not self.liked_rows:
+            return None
+        return self._A_inv @ self._b
+
+    def score(self) -> np.ndarray:
+        """Normalized scores for every game, like CFEngine.score, cached until the next edit."""
+        if self._scores is None:
+            u = self.user_vector()
+            if u is None:
+                self._scores = np.zeros(self.engine.n_items)
+            else:
+                self._scores = minmax_normalize(self.engine.item_scores(u))
+        return self._scores.copy()
+
+
+@lru_cache(maxsize=None)
+def get_cf_engine(model_path: str = MODEL_PATH, games_path: str = GAMES_PATH,
+                  index_path: str = INDEX_PATH, quantized: bool = False,
+                  artifact_dir: Optional[str] = ARTIFACT_DIR) -> CFEngine:
+    """
+    Process-wide CF engine, loaded on first use. quantized=True keeps V as int8.
+
+    The memory-mapped artifacts are used when scripts/build_artifacts.py has written the CF
+    arrays, otherwise the npz and csv.
+    """
+    engine_cls = QuantizedCFEngine if quantized else CFEngine
+    factors = "cf.V_q" if quantized else "cf.V"
+    if artifact_dir and has_artifacts(artifact_dir) and factors in read_manifest(artifact_dir)["arrays"]:
+        return engine_cls.from_artifacts(artifact_dir)
+    return engine_cls.from_files(model_path, games_path, index_path=index_path)
+
+
 def get_cf_scores(
     liked_items: np.ndarray = np.array([]),
     V = None,
-    games_path: str = "./data/games.csv",
+    games_path: str = GAMES_PATH,
 ):
     """
     Compute CF-based recommendation scores based on pre-computed item embedding matrix V and a vector of movie IDs of user likes
@@ -34,9 +639,11 @@ def get_cf_scores(
     Parameters
     ----------
     ratings : array
-        array of indices of liked items
+        array of BGGIds of liked items
     V : matrix
-        item embedding matrix used to predict CF scores
+        item embedding matrix used to predict CF scores, the resident engine is used if None;
+        a given V is scored as it always was: the liked-rows-only fold-in (no V^T V per call)
+        with alpha=5, lambda_=0.3
 
     Returns
     -------
@@ -44,27 +651,13 @@ def get_cf_scores(
         array of ratings for each board game
     """
 
-    #load board game embeddings if it wasn't passed in
     if V is None:
-        data = np.load('./data/V_final_quantized.npz')
-        V = data["V_q"].astype(np.float32) / 127 * data["scale"]
-
-    games_df = pd.read_csv(games_path)['BGGId']
-
-    #get the index number of the liked games
-    liked_index = games_df.isin(liked_items).index
-
-    # calculte user embeddings based on inputted likes 
-    u = fold_in_implicit_user(V,liked_items=liked_index, alpha=5, lambda_=0.3)
-
-    #calculate scores
-    scores = V.dot(u)
-
-    #normalize between 0 and 1 
-    scores = (scores - min(scores)) / (max(scores) - min(scores))
+        engine = get_cf_engine(games_path=games_path)
+    else:
+        engine = CFEngine(V, load_item_ids(games_path), alpha=5, lambda_=0.3, use_gram=False)
 
     # returns array of scores per movie
-    return scores
+    return engine.score(liked_items)
 
 if __name__ == "__main__":
     # Example usage
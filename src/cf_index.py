@@ -0,0 +1,117 @@
+"""
+cf_index.py
+Approximate nearest-neighbour (maximum inner product) index over the CF item factors.
+The rows of V are clustered with k-means into inverted lists; a query only scores the
+items of the few lists whose centroids have the largest inner product with the user vector.
+"""
+
+import numpy as np
+
+INDEX_PATH = "./data/V_final_ivf.npz"
+
+
+def kmeans(X, n_clusters, n_iter=20, seed=42):
+    """Plain Lloyd's k-means, returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = X[rng.choice(len(X), size=n_clusters, replace=False)].copy()
+    x_sq = (X * X).sum(axis=1)
+
+    for _ in range(n_iter):
+        dist = x_sq[:, None] - 2 * X @ centroids.T + (centroids * centroids).sum(axis=1)[None, :]
+        assign = dist.argmin(axis=1)
+
+        counts = np.bincount(assign, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, X)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # re-seed empty clusters on random points so every list stays usable
+        centroids[empty] = X[rng.choice(len(X), size=empty.sum(), replace=False)]
+
+    dist = x_sq[:, None] - 2 * X @ centroids.T + (centroids * centroids).sum(axis=1)[None, :]
+    return centroids, dist.argmin(axis=1)
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of an item embedding matrix.
+
+    Parameters
+    ----------
+    centroids : matrix
+        (n_lists, k) coarse cluster centres
+    list_offsets : array
+        list j holds rows list_rows[list_offsets[j]:list_offsets[j + 1]]
+    list_rows : array
+        row indices of V grouped by list
+    """
+
+    def __init__(self, centroids, list_offsets, list_rows):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int32)
+
+    @classmethod
+    def build(cls, V, n_lists=128, n_iter=20, seed=42):
+        """
+        Cluster the rows of V into n_lists inverted lists.
+
+        Rows are first lifted onto the unit sphere with an extra sqrt(M^2 - |v|^2) coordinate,
+        which turns maximum inner product into nearest neighbour search, so long item vectors
+        (the ones that win inner products) are not lumped together by k-means.
+        """
+        V = np.asarray(V, dtype=np.float32)
+        norms_sq = (V * V).sum(axis=1)
+        max_sq = norms_sq.max()
+        lifted = np.hstack([V, np.sqrt(max_sq - norms_sq)[:, None]]) / np.sqrt(max_sq)
+
+        centroids, assign = kmeans(lifted, n_lists, n_iter=n_iter, seed=seed)
+        # queries are lifted with a 0 in the extra coordinate, so it never affects probing
+        centroids = centroids[:, :-1]
+        list_rows = np.argsort(assign, kind="stable")
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=list_offsets[1:])
+        return cls(centroids, list_offsets, list_rows)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        data = np.load(path)
+        return cls(data["centroids"], data["list_offsets"], data["list_rows"])
+
+    def save(self, path=INDEX_PATH):
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets, list_rows=self.list_rows)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def candidates(self, u, n_probe=8) -> np.ndarray:
+        """Rows of the n_probe lists whose centroids score highest against u."""
+        n_probe = min(n_probe, self.n_lists)
+        probe = np.argpartition(-(self.centroids @ u), n_probe - 1)[:n_probe]
+        return np.concatenate([
+            self.list_rows[self.list_offsets[j]:self.list_offsets[j + 1]] for j in probe
+        ])
+
+    def search(self, V, u, k=10, n_probe=8, exclude_rows=None):
+        """
+        Approximate top-k rows of V by inner product with u.
+
+        Returns
+        -------
+        (rows, scores)
+            arrays of length <= k sorted by descending raw inner product
+        """
+        rows = self.candidates(u, n_probe)
+        if exclude_rows is not None and len(exclude_rows):
+            rows = rows[~np.isin(rows, exclude_rows)]
+        if len(rows) == 0:
+            return rows, np.zeros(0)
+
+        scores = V[rows] @ u
+        k = min(k, len(rows))
+        if k <= 0:
+            return rows[:0], scores[:0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
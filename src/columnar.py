@@ -0,0 +1,237 @@
+"""
+columnar.py
+Columnar (Parquet) copies of the data csvs, read with column projection.
+scripts/build_columnar.py converts each csv in ./data into ./data/columnar/<name>.parquet
+with narrow integer dtypes, dictionary-encoded repeated strings and the semicolon-separated
+label columns pre-split into lists. read_table() and read_batches() read only the requested
+columns, from the Parquet file when it has been built (and is not older than its csv) and
+from the csv otherwise, and return the same frame either way, so every loader works with or
+without the build step.
+
+read_labeled_table() returns the label columns as LabelColumns instead: a sorted vocabulary
+plus CSR-style offsets and int16 codes, so the runtime never holds one Python list per
+game; lists are only materialized for the rows that are displayed.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+COLUMNAR_DIR = "./data/columnar"
+
+
+def semicolon_to_list(value) -> list:
+    if not isinstance(value, str):
+        return []
+    return [item.strip() for item in value.split(";") if item.strip()]
+
+
+def columnar_path(csv_path: str, columnar_dir: str = COLUMNAR_DIR) -> str:
+    """Path of the Parquet copy of a csv: same file name, .parquet, under columnar_dir."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(columnar_dir, name + ".parquet")
+
+
+def has_columnar(csv_path: str, columnar_dir: Optional[str] = COLUMNAR_DIR) -> bool:
+    """Whether a Parquet copy of the csv exists and is not older than the csv."""
+    if not columnar_dir:
+        return False
+    path = columnar_path(csv_path, columnar_dir)
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+class LabelColumn:
+    """
+    Multi-label column as integer-coded ragged arrays.
+
+    Parameters
+    ----------
+    vocab : array
+        sorted distinct labels (str)
+    offsets : array
+        int64, length n_rows + 1; row i carries codes[offsets[i]:offsets[i + 1]]
+    codes : array
+        int16 indices into vocab, in the order the labels appear in each row
+    """
+
+    def __init__(self, vocab, offsets, codes):
+        self.vocab = np.asarray(vocab, dtype=object)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int16)
+
+    @classmethod
+    def from_labels(cls, labels, lengths) -> "LabelColumn":
+        """Build from the flat labels of all rows and the number of labels per row."""
+        codes, vocab = pd.factorize(np.asarray(labels, dtype=object), sort=True)
+        if len(vocab) > np.iinfo(np.int16).max:
+            raise ValueError(f"{len(vocab)} distinct labels do not fit int16 codes")
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.asarray(vocab, dtype=object), offsets, codes)
+
+    @classmethod
+    def from_lists(cls, values: Iterable) -> "LabelColumn":
+        """Build from label lists (a plain string counts as one label, other cells as none)."""
+        cells = []
+        for value in values:
+            if isinstance(value, str):
+                value = [value]
+            elif not isinstance(value, (list, tuple)):
+                value = []
+            cells.append([label for label in value if isinstance(label, str)])
+        return cls.from_labels([label for cell in cells for label in cell], [len(cell) for cell in cells])
+
+    @classmethod
+    def from_strings(cls, values) -> "LabelColumn":
+        """Parse semicolon-separated cells (see semicolon_to_list), each distinct cell once."""
+        cell_codes, cells = pd.factorize(pd.Series(values, dtype=object).where(lambda v: v.map(type) == str))
+        # one parsed row per distinct cell, plus an empty last row for missing cells
+        parsed = [semicolon_to_list(cell) for cell in cells] + [[]]
+        distinct = cls.from_labels([label for cell in parsed for label in cell], [len(cell) for cell in parsed])
+        return distinct.take(np.where(cell_codes >= 0, cell_codes, len(cells)))
+
+    @classmethod
+    def from_arrow(cls, column) -> "LabelColumn":
+        """Build from an Arrow list<string> column (nulls are empty rows)."""
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        lengths = pc.list_value_length(column).fill_null(0).to_numpy()
+        encoded = pc.list_flatten(column).dictionary_encode()
+        # dictionary_encode keeps first-seen order; re-code against the sorted vocabulary
+        vocab = np.asarray(encoded.dictionary.to_pylist(), dtype=object)
+        order = np.argsort(vocab)
+        recode = np.empty(len(vocab), dtype=np.int16)
+        recode[order] = np.arange(len(vocab), dtype=np.int16)
+        codes = recode[encoded.indices.to_numpy(zero_copy_only=False)]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(vocab[order], offsets, codes)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.codes.nbytes + sum(len(label) for label in self.vocab)
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def row_of_code(self) -> np.ndarray:
+        """Row of every entry of codes."""
+        return np.repeat(np.arange(len(self)), self.lengths())
+
+    def take(self, rows) -> "LabelColumn":
+        """The given rows, as a new LabelColumn over the same vocabulary."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, lengths = self.offsets[rows], self.lengths()[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return LabelColumn(self.vocab, offsets, self.codes[positions])
+
+    def rows(self, rows) -> List[List[str]]:
+        """Label lists of the given rows (materialize only what is displayed)."""
+        return [self.vocab[self.codes[self.offsets[r]:self.offsets[r + 1]]].tolist() for r in rows]
+
+
+def _to_frame(table, list_columns: Iterable[str], dtype: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """Arrow table -> the frame pd.read_csv would have produced for the same columns."""
+    dtype = dtype or {}
+    list_columns = set(list_columns)
+    lists = {name: table.column(name).to_pylist() for name in table.column_names if name in list_columns}
+    df = table.drop_columns(list(lists)).to_pandas()
+    for name, values in lists.items():
+        df[name] = [value if value is not None else [] for value in values]
+
+    for field in table.schema:
+        if field.name in lists or field.name in dtype:
+            continue
+        # csv parsing yields int64 and object strings; keep categoricals only when asked for
+        if pa.types.is_integer(field.type) and df[field.name].dtype.kind in "iu":
+            df[field.name] = df[field.name].astype(np.int64)
+        elif pa.types.is_dictionary(field.type):
+            df[field.name] = df[field.name].astype(object)
+    if dtype:
+        df = df.astype({name: kind for name, kind in dtype.items() if name in df.columns})
+    return df[table.column_names]
+
+
+def read_table(csv_path: str, columns: Optional[Iterable[str]] = None, list_columns: Iterable[str] = (),
+               dtype: Optional[Dict[str, str]] = None, columnar_dir: Optional[str] = COLUMNAR_DIR,
+               encoding: str = "utf-8-sig") -> pd.DataFrame:
+    """
+    Read the given columns of a data table.
+
+    Parameters
+    ----------
+    csv_path : str
+        path of the csv; its Parquet copy under columnar_dir is used when present
+    columns : iterable of str, optional
+        columns to read, in file order; names the file does not have are skipped.
+        None reads every column
+    list_columns : iterable of str
+        semicolon-separated label columns, returned as lists of str
+    dtype : dict, optional
+        dtypes to cast columns to
+    columnar_dir : str, optional
+        directory of the Parquet copies, None to always parse the csv
+    """
+    list_columns = list(list_columns)
+    wanted = None if columns is None else set(columns)
+    if not has_columnar(csv_path, columnar_dir):
+        return pd.read_csv(
+            csv_path,
+            usecols=None if wanted is None else (lambda column: column in wanted),
+            converters={col: semicolon_to_list for col in list_columns},
+            dtype={name: kind for name, kind in (dtype or {}).items() if name not in list_columns},
+            encoding=encoding,
+        )
+
+    path = columnar_path(csv_path, columnar_dir)
+    if wanted is not None:
+        columns = [name for name in pq.read_schema(path).names if name in wanted]
+    return _to_frame(pq.read_table(path, columns=columns), list_columns, dtype)
+
+
+def read_labeled_table(csv_path: str, columns: Iterable[str], label_columns: Iterable[str],
+                       dtype: Optional[Dict[str, str]] = None, columnar_dir: Optional[str] = COLUMNAR_DIR,
+                       encoding: str = "utf-8-sig") -> Tuple[pd.DataFrame, Dict[str, LabelColumn]]:
+    """
+    Like read_table, with the label columns returned separately as LabelColumns (in row
+    order of the frame) instead of list columns of the frame.
+    """
+    label_columns = list(label_columns)
+    wanted = set(columns) | set(label_columns)
+    if not has_columnar(csv_path, columnar_dir):
+        df = pd.read_csv(csv_path, usecols=lambda column: column in wanted, encoding=encoding,
+                         dtype={name: kind for name, kind in (dtype or {}).items() if name not in label_columns})
+        labels = {name: LabelColumn.from_strings(df.pop(name)) for name in label_columns if name in df.columns}
+        return df, labels
+
+    path = columnar_path(csv_path, columnar_dir)
+    table = pq.read_table(path, columns=[name for name in pq.read_schema(path).names if name in wanted])
+    labels = {name: LabelColumn.from_arrow(table.column(name)) for name in label_columns
+              if name in table.column_names}
+    return _to_frame(table.drop_columns(list(labels)), (), dtype), labels
+
+
+def read_batches(csv_path: str, columns: Iterable[str], batch_size: int = 1_000_000,
+                 dtype: Optional[Dict[str, str]] = None, columnar_dir: Optional[str] = COLUMNAR_DIR,
+                 encoding: str = "utf-8-sig") -> Iterator[pd.DataFrame]:
+    """Stream the given columns of a large table in frames of about batch_size rows."""
+    columns = list(columns)
+    if not has_columnar(csv_path, columnar_dir):
+        yield from pd.read_csv(csv_path, usecols=columns, dtype=dtype, chunksize=batch_size,
+                               encoding=encoding)
+        return
+
+    parquet_file = pq.ParquetFile(columnar_path(csv_path, columnar_dir))
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield _to_frame(pa.Table.from_batches([batch]), (), dtype)
@@ -0,0 +1,369 @@
+"""
+filters.py
+Precomputed indexes for the sidebar attribute filters.
+The multi-label columns (categories, mechanics, types) are turned into one boolean row
+array per label at load time, scattered straight from their integer codes, so a multi-select filter is an OR of a few arrays instead
+of a Python walk over every game's label list. Numeric columns are kept as compact sorted
+arrays, so a range filter is two binary searches that yield the matching rows directly.
+
+An attributes dict is compiled into a hashable FilterPredicate; the process-wide
+FilterEngine evaluates it against the catalog once and keeps the mask in a small LRU,
+so the LLM candidate pool and the ensemble share one evaluation per request.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from catalog import CATALOG_PATH, get_catalog, get_games, get_labels
+from columnar import LabelColumn
+
+LABEL_COLUMNS = ["game_categories", "game_mechanics", "game_types"]
+
+# attribute -> (column, dtype) for closed-range filters; min_rating is one-sided
+RANGE_COLUMNS = {
+    "game_weight": ("game_weight", np.float32),
+    "year_published": ("year_published", np.int16),
+    "min_rating": ("avg_rating", np.float32),
+}
+# attribute -> (min column, max column, dtype) for filters on an overlapping interval
+INTERVAL_COLUMNS = {
+    "players": ("players_min", "players_max", np.int16),
+    "play_time": ("time_min", "time_max", np.int32),
+}
+
+
+def is_range(value) -> bool:
+    return isinstance(value, (list, tuple)) and len(value) == 2
+
+
+class FilterPredicate(NamedTuple):
+    """
+    Compiled, hashable form of an attributes dict (see model_ensemble.ensemble_scores).
+
+    labels : ((attribute, frozenset of normalized labels), ...)
+    ranges : ((attribute, lo, hi), ...), either bound may be None
+    intervals : ((attribute, lo, hi), ...), matched by overlap
+    """
+    labels: Tuple[Tuple[str, FrozenSet[str]], ...] = ()
+    ranges: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = ()
+    intervals: Tuple[Tuple[str, float, float], ...] = ()
+
+    @property
+    def active(self) -> bool:
+        return bool(self.labels or self.ranges or self.intervals)
+
+
+def _number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def compile_filters(attributes) -> FilterPredicate:
+    """Turn an attributes dict into a FilterPredicate, dropping inactive or malformed filters."""
+    if isinstance(attributes, FilterPredicate):
+        return attributes
+    attributes = attributes or {}
+
+    labels = []
+    for attr_name in LABEL_COLUMNS:
+        selected = frozenset(
+            label for label in map(normalize_label, attributes.get(attr_name) or []) if label
+        )
+        if selected:
+            labels.append((attr_name, selected))
+
+    ranges = []
+    for attr_name in RANGE_COLUMNS:
+        value = attributes.get(attr_name)
+        if attr_name == "min_rating":
+            if isinstance(value, (list, tuple)) and len(value) > 0 and _number(value[0]) is not None:
+                ranges.append((attr_name, _number(value[0]), None))
+        elif is_range(value) and None not in map(_number, value):
+            ranges.append((attr_name, _number(value[0]), _number(value[1])))
+
+    intervals = []
+    for attr_name in INTERVAL_COLUMNS:
+        value = attributes.get(attr_name)
+        if is_range(value) and None not in map(_number, value):
+            intervals.append((attr_name, _number(value[0]), _number(value[1])))
+
+    return FilterPredicate(tuple(labels), tuple(ranges), tuple(intervals))
+
+
+def normalize_label(label) -> Optional[str]:
+    """Lowercase, stripped label, or None for non-strings and blanks."""
+    if isinstance(label, str) and label.strip():
+        return label.strip().lower()
+    return None
+
+
+class LabelIndex:
+    """
+    Label -> rows index over one multi-label column.
+
+    Parameters
+    ----------
+    labels : list
+        normalized (lowercase, stripped) labels
+    bits : matrix
+        (n_labels, n_rows) boolean, bits[j, i] is set when row i carries labels[j]
+    """
+
+    def __init__(self, labels, bits):
+        self.labels = list(labels)
+        self.bits = np.asarray(bits, dtype=bool)
+        self._row_of = {label: j for j, label in enumerate(self.labels)}
+
+    @classmethod
+    def build(cls, values: Iterable) -> "LabelIndex":
+        """Index a column whose cells are label lists (a plain string counts as one label)."""
+        return cls.from_column(LabelColumn.from_lists(values))
+
+    @classmethod
+    def from_column(cls, column: LabelColumn) -> "LabelIndex":
+        """Index an integer-coded LabelColumn; labels are normalized, so case variants merge."""
+        normalized = [normalize_label(label) for label in column.vocab]
+        labels = sorted({label for label in normalized if label})
+        row_of = {label: j for j, label in enumerate(labels)}
+        # vocabulary code -> index row, -1 for labels that normalize to nothing
+        code_rows = np.array([row_of.get(label, -1) for label in normalized], dtype=np.int64)
+
+        label_rows = code_rows[column.codes]
+        keep = label_rows >= 0
+        bits = np.zeros((len(labels), len(column)), dtype=bool)
+        bits[label_rows[keep], column.row_of_code()[keep]] = True
+        return cls(labels, bits)
+
+    @property
+    def n_rows(self) -> int:
+        return self.bits.shape[1]
+
+    def mask(self, selected) -> Optional[np.ndarray]:
+        """
+        Rows that carry any of the selected labels.
+
+        Returns None when nothing usable is selected (the filter is inactive); labels
+        that are not in the index match no rows.
+        """
+        selected = {label for label in map(normalize_label, selected or []) if label}
+        if not selected:
+            return None
+        rows = [self._row_of[label] for label in selected if label in self._row_of]
+        if not rows:
+            return np.zeros(self.n_rows, dtype=bool)
+        return np.logical_or.reduce(self.bits[rows], axis=0)
+
+
+def build_label_indexes(labels, columns=LABEL_COLUMNS) -> Dict[str, LabelIndex]:
+    """
+    LabelIndex for every multi-label column that is present, from a dict of LabelColumns
+    (catalog.get_labels) or a frame with list columns.
+    """
+    if isinstance(labels, dict):
+        return {col: LabelIndex.from_column(labels[col]) for col in columns if col in labels}
+    return {col: LabelIndex.build(labels[col]) for col in columns if col in labels.columns}
+
+
+class RangeIndex:
+    """
+    Sorted view of one numeric column.
+
+    Parameters
+    ----------
+    values : array
+        column values in row order; NaNs never match a range
+    dtype : numpy dtype
+        storage type (float32 / int16 / int32)
+    """
+
+    def __init__(self, values, dtype=np.float32):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        self.n_rows = len(values)
+        self.values = np.where(valid, values, 0).astype(dtype)
+        self.order = np.flatnonzero(valid)[np.argsort(values[valid], kind="stable")].astype(np.int32)
+        self.missing = np.flatnonzero(~valid).astype(np.int32)
+        self.sorted_values = self.values[self.order]
+        self._limits = (int(np.iinfo(dtype).min), int(np.iinfo(dtype).max)) \
+            if self.values.dtype.kind in "iu" else None
+
+    def _bound(self, value, lower):
+        """Query bound in the storage type, so searchsorted never upcasts the column."""
+        if self._limits is None:
+            # a float32 column then matches its own rounded values
+            return self.values.dtype.type(value)
+        value = math.ceil(value) if lower else math.floor(value)
+        return self.values.dtype.type(min(max(value, self._limits[0]), self._limits[1]))
+
+    def span(self, lo=None, hi=None):
+        """(start, stop) positions in order of the values with lo <= value <= hi."""
+        start = 0 if lo is None else np.searchsorted(self.sorted_values, self._bound(lo, True), side="left")
+        stop = len(self.order) if hi is None else np.searchsorted(self.sorted_values, self._bound(hi, False), side="right")
+        return int(start), int(max(start, stop))
+
+    def rows(self, lo=None, hi=None) -> np.ndarray:
+        """Rows with lo <= value <= hi (either bound may be None), in value order."""
+        start, stop = self.span(lo, hi)
+        return self.order[start:stop]
+
+    def mask(self, lo=None, hi=None) -> np.ndarray:
+        """
+        Boolean row mask of rows(lo, hi).
+
+        Narrow spans are scattered from the sorted order; wide ones are cheaper as a
+        vectorized comparison over the compact column.
+        """
+        start, stop = self.span(lo, hi)
+        if stop - start <= self.n_rows // 16:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self.order[start:stop]] = True
+            return mask
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        if lo is not None:
+            np.greater_equal(self.values, self._bound(lo, True), out=mask)
+        if hi is not None:
+            mask &= self.values <= self._bound(hi, False)
+        mask[self.missing] = False
+        return mask
+
+
+class IntervalIndex:
+    """
+    Rows carrying an interval [low, high] (e.g. players_min..players_max), queried by
+    overlap with [lo, hi]: high >= lo and low <= hi.
+    """
+
+    def __init__(self, low_values, high_values, dtype=np.int16):
+        self.low = RangeIndex(low_values, dtype)
+        self.high = RangeIndex(high_values, dtype)
+
+    def rows(self, lo, hi) -> np.ndarray:
+        """
+        Rows whose interval overlaps [lo, hi].
+
+        Each condition is one binary search; the smaller of the two candidate sets is
+        taken from its sorted order and checked against the other column.
+        """
+        low_start, low_stop = self.low.span(None, hi)
+        high_start, high_stop = self.high.span(lo, None)
+        if low_stop - low_start <= high_stop - high_start:
+            rows = self.low.order[low_start:low_stop]
+            return rows[self.high.values[rows] >= self.high._bound(lo, True)]
+        rows = self.high.order[high_start:high_stop]
+        return rows[self.low.values[rows] <= self.low._bound(hi, False)]
+
+    def mask(self, lo, hi) -> np.ndarray:
+        return self.low.mask(None, hi) & self.high.mask(lo, None)
+
+
+class AttributeIndex:
+    """
+    All attribute filters of one game table (see model_ensemble.ensemble_scores for the
+    attributes dict), resolved to row masks or sorted candidate rows.
+    """
+
+    def __init__(self, n_rows, labels, ranges, intervals):
+        self.n_rows = n_rows
+        self.labels = labels
+        self.ranges = ranges
+        self.intervals = intervals
+
+    @classmethod
+    def build(cls, df, labels: Optional[Dict[str, LabelColumn]] = None) -> "AttributeIndex":
+        """Index the numeric columns of df and the label columns (df list columns if labels is None)."""
+        ranges = {
+            attr: RangeIndex(df[col].to_numpy(dtype=np.float64), dtype)
+            for attr, (col, dtype) in RANGE_COLUMNS.items() if col in df.columns
+        }
+        intervals = {
+            attr: IntervalIndex(df[low].to_numpy(dtype=np.float64),
+                                df[high].to_numpy(dtype=np.float64), dtype)
+            for attr, (low, high, dtype) in INTERVAL_COLUMNS.items()
+            if low in df.columns and high in df.columns
+        }
+        return cls(len(df), build_label_indexes(df if labels is None else labels), ranges, intervals)
+
+    def _masks(self, predicate):
+        """Yield one boolean row mask per filter of the predicate this index can evaluate."""
+        for attr_name, selected in predicate.labels:
+            if attr_name in self.labels:
+                yield self.labels[attr_name].mask(selected)
+        for attr_name, lo, hi in predicate.ranges:
+            if attr_name in self.ranges:
+                yield self.ranges[attr_name].mask(lo, hi)
+        for attr_name, lo, hi in predicate.intervals:
+            if attr_name in self.intervals:
+                yield self.intervals[attr_name].mask(lo, hi)
+
+    def mask(self, predicate) -> Optional[np.ndarray]:
+        """
+        Boolean mask of the rows passing every filter, None when no filter is active.
+        predicate is a FilterPredicate or an attributes dict.
+        """
+        combined = None
+        for mask in self._masks(compile_filters(predicate)):
+            combined = mask if combined is None else np.logical_and(combined, mask, out=combined)
+        return combined
+
+    def rows(self, predicate) -> Optional[np.ndarray]:
+        """Sorted rows passing every filter, None when no filter is active."""
+        mask = self.mask(predicate)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+class FilterEngine:
+    """
+    AttributeIndex over the game catalog with an LRU of evaluated predicates.
+
+    Cached masks are shared between callers and read-only; copy before modifying. Safe to
+    call from several threads (the ensemble evaluates filters on its executor too).
+    """
+
+    def __init__(self, index, cache_size=64):
+        self.index = index
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def n_rows(self) -> int:
+        return self.index.n_rows
+
+    def mask(self, attributes) -> Optional[np.ndarray]:
+        """Cached catalog row mask for an attributes dict or FilterPredicate, None if no filter is active."""
+        predicate = compile_filters(attributes)
+        if not predicate.active:
+            return None
+        with self._lock:
+            if predicate in self._cache:
+                self._cache.move_to_end(predicate)
+                return self._cache[predicate]
+
+        # evaluated outside the lock; a concurrent miss on the same predicate stores an equal mask
+        mask = self.index.mask(predicate)
+        if mask is not None:
+            mask.flags.writeable = False
+        with self._lock:
+            self._cache[predicate] = mask
+            self._cache.move_to_end(predicate)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return mask
+
+
+@lru_cache(maxsize=None)
+def get_filter_engine(catalog_path: str = CATALOG_PATH) -> FilterEngine:
+    """Process-wide filter engine over the catalog rows (catalog.get_catalog), loaded on first use."""
+    # get_games() rows, which the label columns share, are sorted by BGGId like the catalog;
+    # align() returns the same frame, or raises if the catalog was built from another table
+    games = get_catalog().align(get_games(catalog_path))
+    return FilterEngine(AttributeIndex.build(games, get_labels(catalog_path)))
@@ -1,184 +1,212 @@
+import asyncio
+import hashlib
 import io
-from typing import Any, Dict, Optional
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import streamlit as st
 
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-
-
-def semicolon_to_list(value: Any) -> list:
-    """Normalize semicolon-delimited strings (or lists) into clean lists."""
-    if value is None or (isinstance(value, float) and pd.isna(value)):
-        return []
-    if isinstance(value, list):
-        return [item.strip() for item in value if isinstance(item, str) and item.strip()]
-    if isinstance(value, str):
-        return [item.strip() for item in value.split(";") if item.strip()]
-    return []
-
-# Load game data
-games_df = pd.read_csv("./data/games_master_data.csv", encoding="utf-8-sig")
-
-for col in [
-    "game_categories",
-    "simple_game_categories",
-    "game_mechanics",
-    "simple_game_mechanics",
-    "game_types",
-]:
-    if col in games_df.columns:
-        games_df[col] = games_df[col].apply(semicolon_to_list)
-
-if "game_categories" in games_df.columns and "simple_game_categories" in games_df.columns:
-    games_df.drop(columns=["game_categories"], inplace=True)
-if "game_mechanics" in games_df.columns and "simple_game_mechanics" in games_df.columns:
-    games_df.drop(columns=["game_mechanics"], inplace=True)
-
-games_df.rename(
-    columns={
-        "simple_game_categories": "game_categories",
-        "simple_game_mechanics": "game_mechanics",
-    },
-    inplace=True,
-)
-
-desc_df = pd.read_csv("./data/game_descriptions.csv", encoding="utf-8-sig").rename(
-    columns={"bgg_id": "bgg_id", "full_description": "Description"}
-)
-
-# Merge datasets on bgg_id
-merged_df = pd.merge(
-    games_df.drop(columns=["Description"], errors="ignore"),
-    desc_df[["bgg_id", "Description"]],
-    on="bgg_id",
-    how="inner"
-)
-
-# Extract all category columns automatically
-category_source = games_df["game_categories"] if "game_categories" in games_df.columns else []
-all_categories = sorted(
-    {
-        cat.strip()
-        for cats in category_source
-        for cat in (cats if isinstance(cats, list) else [])
-        if isinstance(cat, str) and cat.strip()
-    }
-)
+from catalog import get_catalog, get_descriptions, get_games, get_labels
+from filters import get_filter_engine
+from result_cache import ResultCache
+from text_index import get_text_index
+
+
+def openai_api_key() -> Optional[str]:
+    """
+    An OPENAI_API_KEY environment variable, else the Streamlit secret; None when neither
+    is set. OPENAI_BASE_URL (read by the clients) points the calls at another
+    OpenAI-compatible server.
+    """
+    if os.environ.get("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"]
+    try:
+        return st.secrets["OPENAI_API_KEY"]
+    except (KeyError, FileNotFoundError):
+        return None
+
+
+api_key = openai_api_key()
+# without a key the module still imports: cached scores are served, new ones raise, and
+# model_ensemble scores the description with the local LSA model instead
+client = OpenAI(api_key=api_key) if api_key else None
+
+LLM_MODEL = "gpt-4o-mini"
+# bump whenever the prompt below changes, cached scores of older prompts are then never used
+PROMPT_VERSION = 1
+
+# Scores the LLM returned, kept on disk per (description, model, prompt, candidates)
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", "./data/cache")  # None or "" for memory only
+LLM_CACHE_TTL = 7 * 24 * 3600  # seconds
+LLM_CACHE_ENTRIES = 10_000  # on disk; one entry is ~4 KB for 200 candidates
+
+# Candidate pool sizes: the best-rated games when the description matches no indexed
+# word, the games whose descriptions match it best (text_index) otherwise
+LLM_TOP_K = 200
+RETRIEVAL_TOP_K = 50
+LLM_RETRIEVAL = True  # False always sends the LLM_TOP_K best-rated games
+
+# Chunked scoring: candidates are sent in prompts of LLM_CHUNK_SIZE games, at most
+# LLM_CONCURRENCY in flight; a chunk gets LLM_CHUNK_TIMEOUT seconds per attempt and
+# LLM_CHUNK_RETRIES more attempts. None as chunk size sends one prompt with every candidate.
+LLM_CHUNK_SIZE = 25
+LLM_CONCURRENCY = 8
+LLM_CHUNK_TIMEOUT = 30.0
+LLM_CHUNK_RETRIES = 1
+
+
+# Load game data (shared catalog table, read-only) and the games that have descriptions
+catalog = get_catalog()
+games_df = catalog.align(get_games())
+desc_df = get_descriptions()
+# descriptions may miss games, but every id must be a unique catalog game
+description_layout = catalog.layout("descriptions", desc_df["bgg_id"], complete=False)
+
+# Candidate pool: catalog games with a description, tagged with their catalog row
+has_description = description_layout.artifact_rows >= 0
+merged_df = games_df.loc[
+    has_description, ["bgg_id", "name", "year_published", "description", "avg_rating"]
+].reset_index(drop=True)
+merged_df["catalog_row"] = np.flatnonzero(has_description)
+
+# Extract all category columns automatically (the sorted category vocabulary)
+category_labels = get_labels().get("game_categories")
+all_categories = category_labels.vocab.tolist() if category_labels is not None else []
 category_columns = all_categories
 
 
 def apply_attribute_filters(df: pd.DataFrame, attributes: Optional[Dict[str, Any]]) -> pd.DataFrame:
-    """Apply the same attribute masks used by the ensemble to the LLM candidate pool."""
-    if not attributes:
+    """
+    Apply the same attribute masks used by the ensemble to the LLM candidate pool.
+    The mask comes from the shared filter engine (evaluated once per attributes and cached);
+    df must carry the catalog_row column.
+    """
+    mask = get_filter_engine().mask(attributes)
+    if mask is None:
         return df
+    return df[mask[df["catalog_row"].to_numpy()]]
 
-    mask = pd.Series(True, index=df.index)
-
-    def multi_label_mask(column: str):
-        selected = attributes.get(column, [])
-        if column not in df.columns or not selected:
-            return None
-        selected_clean = {
-            s.strip().lower() for s in selected if isinstance(s, str) and s.strip()
-        }
-        if not selected_clean:
-            return None
-
-        def matches(values):
-            if isinstance(values, (list, tuple)):
-                return any(
-                    isinstance(v, str) and v.strip().lower() in selected_clean
-                    for v in values
-                )
-            if isinstance(values, str):
-                return values.strip().lower() in selected_clean
-            return False
-
-        return df[column].apply(matches).fillna(False)
-
-    for attr_column in ["game_categories", "game_mechanics", "game_types"]:
-        column_mask = multi_label_mask(attr_column)
-        if column_mask is not None:
-            mask &= column_mask
-
-    def range_mask(column: str, value_range):
-        if column not in df.columns:
-            return None
-        if (
-            isinstance(value_range, (list, tuple))
-            and len(value_range) == 2
-            and any(value_range)
-        ):
-            min_val, max_val = value_range
-            series = df[column]
-            return series.between(min_val, max_val, inclusive="both").fillna(False)
+@lru_cache(maxsize=None)
+def text_index_layout():
+    """Catalog rows of the description index documents."""
+    return catalog.layout("text_index", get_text_index().doc_ids, complete=False)
+
+
+def description_relevance(description: Optional[str]) -> Optional[np.ndarray]:
+    """BM25 relevance of every game's full description (catalog row order), None if no word matches."""
+    if not LLM_RETRIEVAL or not description:
         return None
+    scores = get_text_index().scores(description)
+    return text_index_layout().to_catalog(scores) if scores.any() else None
+
+
+def candidate_pool(attributes: Optional[Dict[str, Any]] = None, top_k: Optional[int] = None,
+                   description: Optional[str] = None) -> pd.DataFrame:
+    """
+    The games sent to the LLM, among the games with a description that pass the attribute
+    filters (the same masks used downstream, so the LLM signal survives the final ensemble
+    filtering): the top_k (RETRIEVAL_TOP_K) whose full descriptions match the user's
+    description best, ties and any remainder by rating; or, when no word of the description
+    is indexed, the top_k (LLM_TOP_K) best-rated.
+    """
+    filtered_df = apply_attribute_filters(merged_df, attributes or {})
+    relevance = description_relevance(description)
+    if relevance is None:
+        # Limit to top games by rating for token efficiency
+        return filtered_df.sort_values("avg_rating", ascending=False).head(top_k or LLM_TOP_K)
+
+    # by relevance, then rating: unmatched games (relevance 0) follow in rating order
+    order = np.lexsort((-filtered_df["avg_rating"].to_numpy(dtype=np.float64),
+                        -relevance[filtered_df["catalog_row"].to_numpy()]))
+    return filtered_df.iloc[order[:top_k or RETRIEVAL_TOP_K]]
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache() -> ResultCache:
+    """Process-wide LLM score cache, in LLM_CACHE_DIR/llm_scores.sqlite; stats() has its hit rate."""
+    path = os.path.join(LLM_CACHE_DIR, "llm_scores.sqlite") if LLM_CACHE_DIR else None
+    cache = ResultCache(ttl=LLM_CACHE_TTL, path=path, version=f"{LLM_MODEL}/{PROMPT_VERSION}",
+                        max_disk_entries=LLM_CACHE_ENTRIES)
+    cache.purge()
+    return cache
+
+
+def llm_cache_key(user_description: str, candidate_ids, chunk_size: Optional[int] = None) -> str:
+    """
+    SHA-256 of the normalized description, model, prompt version, the ordered candidate
+    ids and how they were split into prompts (chunk_size, None for one prompt).
+    """
+    return hashlib.sha256(json.dumps({
+        "description": " ".join(user_description.split()),
+        "model": LLM_MODEL,
+        "prompt": PROMPT_VERSION,
+        "candidates": [int(i) for i in candidate_ids],
+        "chunk_size": chunk_size,
+    }).encode("utf-8")).hexdigest()
 
-    weight_mask = range_mask("game_weight", attributes.get("game_weight"))
-    if weight_mask is not None:
-        mask &= weight_mask
-
-    year_mask = range_mask("year_published", attributes.get("year_published"))
-    if year_mask is not None:
-        mask &= year_mask
-
-    rating_values = attributes.get("min_rating")
-    if (
-        "avg_rating" in df.columns
-        and isinstance(rating_values, (list, tuple))
-        and rating_values
-    ):
-        min_rating = rating_values[0]
-        rating_mask = (df["avg_rating"] >= min_rating).fillna(False)
-        mask &= rating_mask
-
-    players_range = attributes.get("players")
-    if (
-        isinstance(players_range, (list, tuple))
-        and len(players_range) == 2
-        and "players_min" in df.columns
-        and "players_max" in df.columns
-    ):
-        p_min, p_max = players_range
-        players_mask = (df["players_max"] >= p_min) & (df["players_min"] <= p_max)
-        mask &= players_mask.fillna(False)
-
-    play_time_range = attributes.get("play_time")
-    if (
-        isinstance(play_time_range, (list, tuple))
-        and len(play_time_range) == 2
-        and play_time_range
-        and "time_min" in df.columns
-        and "time_max" in df.columns
-    ):
-        t_min, t_max = play_time_range
-        time_mask = (df["time_max"] >= t_min) & (df["time_min"] <= t_max)
-        mask &= time_mask.fillna(False)
-
-    return df[mask]
 
 def get_llm_scores(
     user_description: str,
     attributes: Optional[Dict[str, Any]] = None,
-    top_k: int = 200,
+    top_k: Optional[int] = None,
+    candidate_games: Optional[pd.DataFrame] = None,
+    use_cache: bool = True,
+    chunk_size: Optional[int] = LLM_CHUNK_SIZE,
+    return_complete: bool = False,
 ):
     """
-    Generate LLM-based relevance scores for candidate games based on the user description.
-    The candidate pool is filtered with the same attribute masks used downstream so that
-    the LLM signal survives the final ensemble filtering.
+    Generate LLM-based relevance scores (one per catalog row) for candidate games based on the user description.
+    The candidates are candidate_pool(attributes, top_k, user_description) unless given. With use_cache, the
+    scores of an earlier call for the same description and candidates (in the same order)
+    come from get_llm_cache() instead of the API.
+
+    The candidates are scored chunk_size at a time by concurrent requests (see
+    score_in_chunks), or in one prompt if chunk_size is None. When some chunks fail the
+    games of the others are still scored (the rest stay 0) and nothing is cached; when
+    all fail the last error is raised. With return_complete the result is a tuple
+    (scores, complete), complete being False for such partial (or unparsable) answers.
     """
-    attributes = attributes or {}
-    filtered_df = apply_attribute_filters(merged_df, attributes)
-
-    if filtered_df.empty:
-        return np.zeros(len(games_df))
-
-    # Limit to top games by rating for token efficiency
-    candidate_games = filtered_df.sort_values("avg_rating", ascending=False).head(top_k)
-
+    if candidate_games is None:
+        candidate_games = candidate_pool(attributes, top_k, user_description)
+
+    if candidate_games.empty:
+        full_scores = np.zeros(catalog.n_rows)
+        return (full_scores, True) if return_complete else full_scores
+
+    # the prompt is built from the normalized description, so equal keys mean equal prompts
+    user_description = " ".join((user_description or "").split())
+    key = llm_cache_key(user_description, candidate_games["bgg_id"], chunk_size) if use_cache else None
+    score_map = get_llm_cache().get(key) if use_cache else None
+    complete = True
+    if score_map is None:
+        if client is None:
+            raise RuntimeError("No OPENAI_API_KEY in the environment or the Streamlit secrets")
+        if chunk_size is None:
+            score_map, failed = request_llm_scores(user_description, candidate_games), 0
+        else:
+            score_map, failed = score_in_chunks(user_description, candidate_games, chunk_size)
+        # partial answers, or one that could not be parsed, are not worth keeping
+        complete = bool(score_map) and not failed
+        if use_cache and complete:
+            get_llm_cache().put(key, score_map)
+
+    # Fill scores for all games, in catalog row order
+    full_scores = np.zeros(catalog.n_rows)
+    if score_map:
+        rows = catalog.ids_to_rows(list(score_map.keys()))
+        scores = np.fromiter(score_map.values(), dtype=np.float64, count=len(score_map))
+        full_scores[rows[rows >= 0]] = scores[rows >= 0]
+
+    return (full_scores, complete) if return_complete else full_scores
+
+
+def build_messages(user_description: str, candidate_games: pd.DataFrame) -> List[Dict[str, str]]:
+    """Chat messages asking the LLM to score candidate_games against the description."""
     # Prepare text for LLM input
     descriptions = "\n\n".join([
         f"Name: {row['name']}\nYear: {row['year_published']}\nDescription: {row.get('description', '')}"
@@ -201,16 +229,87 @@ def get_llm_scores(
     {descriptions}
     """
 
+    return [
+        {"role": "system", "content": "You are an expert board game recommender that outputs structured data."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def request_llm_scores(user_description: str, candidate_games: pd.DataFrame) -> Dict[int, float]:
+    """Ask the LLM to score candidate_games in one prompt; {bgg_id: score} of the games it named."""
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are an expert board game recommender that outputs structured data."},
-            {"role": "user", "content": prompt}
-        ],
+        model=LLM_MODEL,
+        messages=build_messages(user_description, candidate_games),
         temperature=0.3
     )
+    return parse_llm_scores(response.choices[0].message.content, candidate_games)
+
 
-    csv_output = response.choices[0].message.content.strip()
+async def request_llm_scores_async(
+    user_description: str,
+    candidate_games: pd.DataFrame,
+    chunk_size: int = LLM_CHUNK_SIZE,
+    concurrency: int = LLM_CONCURRENCY,
+    timeout: float = LLM_CHUNK_TIMEOUT,
+    retries: int = LLM_CHUNK_RETRIES,
+) -> Tuple[Dict[int, float], List[BaseException]]:
+    """
+    Score candidate_games in chunks of chunk_size, at most concurrency requests at a time.
+
+    Each chunk is one request with its own timeout, retried up to retries times (with a
+    short backoff) on a timeout, an API error or an answer without scores. Returns the merged {bgg_id: score} of
+    the chunks that were answered and the final error of each chunk that was not.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    chunks = [candidate_games.iloc[start:start + chunk_size] for start in range(0, len(candidate_games), chunk_size)]
+
+    # retries are counted here, the client's own would multiply them
+    async with AsyncOpenAI(api_key=api_key, max_retries=0) as async_client:
+        async def score_chunk(chunk):
+            for attempt in range(retries + 1):
+                try:
+                    async with semaphore:
+                        response = await asyncio.wait_for(async_client.chat.completions.create(
+                            model=LLM_MODEL,
+                            messages=build_messages(user_description, chunk),
+                            temperature=0.3
+                        ), timeout)
+                    scores = parse_llm_scores(response.choices[0].message.content, chunk)
+                    if not scores:
+                        raise ValueError("no scores in the LLM answer")
+                    return scores
+                except Exception as e:
+                    if attempt == retries:
+                        return e
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+
+        results = await asyncio.gather(*(score_chunk(chunk) for chunk in chunks))
+
+    score_map, errors = {}, []
+    for result in results:
+        if isinstance(result, BaseException):
+            errors.append(result)
+        else:
+            score_map.update(result)
+    return score_map, errors
+
+
+def score_in_chunks(user_description: str, candidate_games: pd.DataFrame,
+                    chunk_size: int = LLM_CHUNK_SIZE) -> Tuple[Dict[int, float], int]:
+    """
+    Blocking request_llm_scores_async (on an event loop of its own, so not from inside a
+    running loop; await the coroutine there). Returns the scores and the number of
+    failed chunks; raises the last error if no chunk was answered.
+    """
+    score_map, errors = asyncio.run(request_llm_scores_async(user_description, candidate_games, chunk_size))
+    if errors and not score_map:
+        raise errors[-1]
+    return score_map, len(errors)
+
+
+def parse_llm_scores(content: str, candidate_games: pd.DataFrame) -> Dict[int, float]:
+    """{bgg_id: score} from the LLM's Name,LLM_Score CSV answer, for the names of candidate_games."""
+    csv_output = content.strip()
     csv_output = "\n".join(line for line in csv_output.splitlines() if not line.strip().startswith("```")).strip()
 
     # Convert CSV text to DataFrame with resilient parsing
@@ -220,7 +319,7 @@ def get_llm_scores(
         # Manual fallback: strip formatting and ensure 2 columns
         lines = [line for line in csv_output.splitlines() if "," in line]
         if not lines:
-            return np.zeros(len(games_df))
+            return {}
 
         # Clean commas within quoted names and trim whitespace
         clean_lines = []
@@ -258,15 +357,7 @@ def get_llm_scores(
     llm_scores_df = candidate_lookup.merge(llm_scores_df, on="name", how="right")
     llm_scores_df.dropna(subset=["bgg_id"], inplace=True)
 
-    # Fill scores for all games
-    full_scores = np.zeros(len(games_df))
-    score_map = dict(zip(llm_scores_df["bgg_id"], llm_scores_df["llm_score"]))
-    for idx, row in games_df.iterrows():
-        bgg_id = row["bgg_id"] if "bgg_id" in games_df.columns else row["bgg_id"]
-        if bgg_id in score_map:
-            full_scores[idx] = score_map[bgg_id]
-
-    return full_scores
+    return {int(bgg_id): float(score) for bgg_id, score in zip(llm_scores_df["bgg_id"], llm_scores_df["llm_score"])}
 
 if __name__ == "__main__":
     scores = get_llm_scores(
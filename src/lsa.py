@@ -0,0 +1,94 @@
+"""
+lsa.py
+Local text relevance: LSA embeddings (truncated SVD of TF-IDF) of the full game descriptions.
+scripts/build_lsa.py fits them offline with scikit-learn and stores plain arrays: the
+vocabulary and idf weights, the SVD components that project a TF-IDF vector, and one
+unit-length float32 embedding per game. At query time the user's description is weighted
+and projected with the same arrays and every game is scored with one matrix-vector
+product, in milliseconds and without the network. model_ensemble uses it as a replacement
+for, or a complement to, the OpenAI scores.
+"""
+
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from text_index import tokenize
+
+LSA_PATH = "./data/description_lsa.npz"
+LSA_DIMENSIONS = 128
+
+
+class LSAModel:
+    """
+    Description embeddings and the projection of new text into their space.
+
+    Parameters
+    ----------
+    vocab : array
+        terms of the TF-IDF vocabulary, in column order
+    idf : array
+        idf weight of every term
+    components : matrix
+        (k, n_terms) SVD components; a TF-IDF row x embeds as components @ x
+    embeddings : matrix
+        (n_docs, k) unit-length embedding of every description
+    doc_ids : array
+        bgg_id of every embedding row
+    sublinear_tf : bool
+        term counts were weighted 1 + log(tf) instead of tf
+    """
+
+    def __init__(self, vocab, idf, components, embeddings, doc_ids, sublinear_tf=True):
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.sublinear_tf = bool(sublinear_tf)
+        self._term_ids = {term: t for t, term in enumerate(self.vocab.tolist())}
+
+    @classmethod
+    def load(cls, path=LSA_PATH):
+        data = np.load(path)
+        return cls(data["vocab"], data["idf"], data["components"], data["embeddings"], data["doc_ids"],
+                   bool(data["sublinear_tf"]))
+
+    def save(self, path=LSA_PATH):
+        np.savez(path, vocab=self.vocab, idf=self.idf, components=self.components, embeddings=self.embeddings,
+                 doc_ids=self.doc_ids, sublinear_tf=np.array(self.sublinear_tf))
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of text (weighted like the descriptions), None if no term is known."""
+        counts = Counter(self._term_ids[t] for t in tokenize(text) if t in self._term_ids)
+        if not counts:
+            return None
+        terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        weights = (1 + np.log(tf) if self.sublinear_tf else tf) * self.idf[terms]
+        weights /= np.linalg.norm(weights)
+        u = self.components[:, terms] @ weights
+        norm = np.linalg.norm(u)
+        return u / norm if norm > 0 else None
+
+    def scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of text with every description (embedding row order); 0 if nothing matches."""
+        u = self.embed(text)
+        if u is None:
+            return np.zeros(self.n_docs, dtype=np.float32)
+        return self.embeddings @ u
+
+
+@lru_cache(maxsize=None)
+def get_lsa_model(path: str = LSA_PATH) -> LSAModel:
+    """Process-wide LSA model written by scripts/build_lsa.py."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No LSA model at '{path}', run scripts/build_lsa.py first")
+    return LSAModel.load(path)
@@ -1,72 +1,150 @@
 import pandas as pd
 import numpy as np
+import time
 import warnings
-
-from cbf import get_cbf_scores
-from cf import get_cf_scores
-from llm import get_llm_scores
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+import cbf
+import result_cache
+from artifacts import content_hash
+from catalog import get_catalog, get_games, get_labels
+from cbf import build_query_vector, get_cbf_raw_scores
+from cf import get_cf_engine, minmax_normalize
+from llm import api_key as openai_api_key, candidate_pool, get_llm_scores
+from lsa import get_lsa_model
+from filters import get_filter_engine
+from score_cache import get_score_cache
 
 warnings.filterwarnings('ignore')
 
-### Load games into games_df
-games_file = "./data/games_master_data.csv"
-
-
-def semicolon_to_list(value):
-    if pd.isna(value) or value == "":
-        return []
-    if isinstance(value, list):  # prevent double conversion
-        return value
-    return [item.strip() for item in str(value).split(';') if item.strip()]
-
-games_df = pd.read_csv(
-    games_file,
-    usecols=['bgg_id',
-             'name',
-             'description',
-             'image',
-             'thumbnail',
-             'bgg_link',
-             'avg_rating',
-             'bgg_rating',
-             'users_rated',
-             'game_weight',
-             'players_min',
-             'players_max',
-             'players_best',
-             'time_min',
-             'time_max',
-             'time_avg',
-             'simple_game_mechanics',
-             'simple_game_categories',
-             'game_types',
-             'year_published'],
-    
-    converters={'simple_game_mechanics': semicolon_to_list,
-                'simple_game_categories': semicolon_to_list,
-                'game_types': semicolon_to_list},
-    
-    dtype={'bgg_id':        'int64',
-           'avg_rating':    'float64',
-           'bgg_rating':    'float64',
-           'users_rated':   'int64',
-           'game_weight':   'float64',
-           'players_best':  'float64',
-           'players_min':   'int64',
-           'players_max':   'int64',
-           'players_best':  'float64',
-           'time_min':      'int64',
-           'time_max':      'int64',
-           'time_avg':      'int64'})
-
-games_df.rename(columns={'simple_game_categories': 'game_categories', 'simple_game_mechanics': 'game_mechanics'}, inplace=True)
-
-games_df = games_df.set_index("bgg_id", drop=False)
+### Load games into games_df (the shared catalog table; rows are catalog rows)
+catalog = get_catalog()
+games_df = catalog.align(get_games())
 n_games = games_df.shape[0]
+# categories/mechanics/types as integer-coded LabelColumns in the same row order
+game_labels = get_labels()
+RECOMMENDATION_COLUMNS = [
+    'bgg_id', 'name', 'avg_rating', 'game_categories',
+    'game_mechanics', 'game_weight', 'game_types',
+    'year_published', 'players_min', 'players_max'
+]
+
+# CF and CBF rows are mapped through checked layouts
+cf_layout = catalog.layout("cf", get_cf_engine().item_ids)
+cbf_layout = catalog.layout("cbf", cbf.item_ids)
 
 # Toggle to include/exclude attribute-based filtering when inspecting hybrid scores.
 APPLY_ATTRIBUTE_FILTERS = True
 
+# Seconds ensemble_scores waits for all three models; an LLM answer later than this is
+# dropped for the request (beta=0). None waits for the LLM however long it takes.
+ENSEMBLE_DEADLINE = 30.0
+# Threads scoring the models; LLM calls past their deadline keep one busy until they return
+ENSEMBLE_WORKERS = 8
+
+# What scores the description: "llm" (OpenAI), "lsa" (local LSA embeddings, built by
+# scripts/build_lsa.py) or "llm+lsa" (the mean of both; LSA alone if the LLM misses the
+# deadline). Without an OpenAI key only LSA can score new descriptions.
+TEXT_SCORERS = ("llm", "lsa", "llm+lsa")
+TEXT_SCORER = "llm" if openai_api_key else "lsa"
+
+
+@lru_cache(maxsize=None)
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool the CF, CBF and LLM scorers are dispatched to."""
+    return ThreadPoolExecutor(max_workers=ENSEMBLE_WORKERS, thread_name_prefix="ensemble")
+
+
+### compile filters and exclusions into candidate rows
+def plan_candidates(attributes=None, excluded_ids=()) -> np.ndarray:
+    """
+    Sorted catalog (games_df) rows that pass the attribute filters and are not excluded.
+
+    The models score the whole catalog (memoized per model input, and normalized over the
+    catalog); only these rows are combined and ranked.
+    """
+    mask = get_filter_engine().mask(attributes) if APPLY_ATTRIBUTE_FILTERS else None
+    # the engine's masks are cached and shared with the LLM candidate pool, never modify them
+    mask = np.ones(n_games, dtype=bool) if mask is None else mask.copy()
+
+    mask[catalog.known_rows(excluded_ids)] = False
+    return np.flatnonzero(mask)
+
+### memoized full score vectors (catalog row order, un-normalized), keyed on each model's own inputs
+def cf_vector(liked_games, cf_session=None) -> np.ndarray:
+    """Raw CF scores for the liked games (zeros if none is known), keyed on the known liked games."""
+    engine = get_cf_engine() if cf_session is None else cf_session.engine
+
+    def compute():
+        if cf_session is not None:
+            cf_session.set_liked(liked_games)
+            u = cf_session.user_vector()
+        else:
+            u = engine.user_vector(liked_games)
+        if u is None:
+            return np.zeros(n_games, dtype=np.float32)
+        return cf_layout.to_catalog(engine.item_scores(u))
+
+    return get_score_cache().get_or_compute("cf", engine.ids_to_rows(liked_games).tobytes(), compute)
+
+
+def cbf_vector(attributes) -> np.ndarray:
+    """Raw CBF similarities, keyed on the query vector (only labels and weight/players/play time count)."""
+    query_vector = build_query_vector(attributes)
+    return get_score_cache().get_or_compute(
+        "cbf", query_vector.tobytes(), lambda: cbf_layout.to_catalog(get_cbf_raw_scores(query_vector))
+    )
+
+
+def llm_vector(description, attributes) -> np.ndarray:
+    """
+    LLM scores, keyed on the description and the candidate pool the LLM would be sent: a
+    filter change that leaves the pool (the games passing the filters that best match the
+    description) as it was reuses the vector. Partial answers (some chunks failed) are
+    returned but not kept, so the next request asks the LLM again.
+    """
+    pool = candidate_pool(attributes, description=description)
+    key = (" ".join((description or "").split()), pool["bgg_id"].to_numpy(dtype=np.int64).tobytes())
+    score_cache = get_score_cache()
+    scores = score_cache.get("llm", key)
+    if scores is not None:
+        return scores
+    scores, complete = get_llm_scores(user_description=description or "", attributes=attributes,
+                                      candidate_games=pool, return_complete=True)
+    return score_cache.put("llm", key, scores) if complete else scores
+
+@lru_cache(maxsize=None)
+def lsa_layout():
+    """Catalog rows of the LSA embeddings (loaded on first use, the model is optional)."""
+    return catalog.layout("lsa", get_lsa_model().doc_ids, complete=False)
+
+
+def lsa_vector(description) -> np.ndarray:
+    """LSA cosine of the description with every game's description, keyed on the normalized description."""
+    description = " ".join((description or "").split())
+    return get_score_cache().get_or_compute(
+        "lsa", description, lambda: lsa_layout().to_catalog(get_lsa_model().scores(description))
+    )
+
+### result cache
+@lru_cache(maxsize=None)
+def model_version() -> str:
+    """Hash of the CF factors, CBF features and catalog ids; on-disk cached results are tied to it."""
+    cf_engine = get_cf_engine()
+    return content_hash({
+        "catalog": catalog.bgg_ids,
+        "cf_ids": cf_engine.item_ids,
+        "cf": cf_engine.factor_rows(slice(None)),
+    }, meta={"cbf": cbf.content_hash})
+
+
+def get_result_cache() -> result_cache.ResultCache:
+    """The process-wide result cache (the SQLite tier when result_cache.RESULT_CACHE_PATH is set)."""
+    path = result_cache.RESULT_CACHE_PATH
+    return result_cache.get_result_cache(path, model_version() if path else "")
+
+
 ### get enseble score
 def ensemble_scores(liked_games=None,
                     disliked_games=None,
@@ -75,7 +153,12 @@ def ensemble_scores(liked_games=None,
                     description=None,
                     alpha: float = 0.5,
                     beta: float = 0.33,
-                    n_recommendations: int = 5) -> pd.DataFrame:
+                    n_recommendations: int = 5,
+                    cf_session=None,
+                    timings: dict = None,
+                    use_cache: bool = True,
+                    deadline: float = ENSEMBLE_DEADLINE,
+                    text_scorer: str = None) -> pd.DataFrame:
     """
 :    Ensemble CF, CBF, and LLM models using a hybrid weighting formula and filter
 
@@ -95,6 +178,21 @@ def ensemble_scores(liked_games=None,
         'play_time': [30,90], # list of min and max play time in minutes
         'min_rating':[6.0], # single value list of min rating
         'year_published':[2010,2025] # list of min, max year published
+    cf_session - optional cf.CFSession; its incrementally updated user vector is used for CF
+    timings - optional dict, filled with the milliseconds spent per stage
+        ('plan', 'cf', 'cbf', 'llm', 'lsa', 'combine', 'top_n'), or only 'cache' on a cache
+        hit; the models run concurrently, each is the time until its scores were in
+    use_cache - reuse the result of an equivalent earlier query (see result_cache); the
+        counters are in get_result_cache().stats()
+    deadline - seconds to wait for the three models (None: no limit). If the LLM has not
+        answered by then, or fails, the result is built from CF/CBF alone (beta=0) and
+        recommendations.attrs['degraded'] says why, e.g. {'llm': 'timeout after 30.0 s'};
+        the late LLM answer still lands in the score cache for the next request.
+        Degraded results are not put in the result cache.
+    text_scorer - 'llm', 'lsa' or 'llm+lsa' (default TEXT_SCORER): what scores the
+        description, see TEXT_SCORERS; its weight is beta and its share of the score is
+        reported as llm_score_component whichever it is. With 'llm+lsa' a late or failed
+        LLM leaves the LSA scores instead of beta=0.
 
     Returns: pandas datafram of top-n games and these colums
 
@@ -107,24 +205,104 @@ def ensemble_scores(liked_games=None,
     pd.DataFrame
         Combined recommendations with composite score.
     """
+    text_scorer = text_scorer or TEXT_SCORER
+    if text_scorer not in TEXT_SCORERS:
+        raise ValueError(f"text_scorer must be one of {TEXT_SCORERS}, got '{text_scorer}'")
+    if not use_cache:
+        return _ensemble_scores(liked_games, disliked_games, exclude_games, attributes, description,
+                                alpha, beta, n_recommendations, cf_session, timings, deadline, text_scorer)
+
+    t0 = time.perf_counter()
+    cache = get_result_cache()
+    key = result_cache.query_key(liked_games, disliked_games, exclude_games, attributes, description,
+                                 alpha, beta, n_recommendations, filters=APPLY_ATTRIBUTE_FILTERS,
+                                 text_scorer=text_scorer)
+    recommendations = cache.get(key)
+    if recommendations is not None:
+        if timings is not None:
+            timings['cache'] = (time.perf_counter() - t0) * 1000
+    else:
+        recommendations = _ensemble_scores(liked_games, disliked_games, exclude_games, attributes, description,
+                                           alpha, beta, n_recommendations, cf_session, timings, deadline,
+                                           text_scorer)
+        # a degraded result is only a fallback, the next request should try the LLM again
+        if not (isinstance(recommendations, pd.DataFrame) and recommendations.attrs.get('degraded')):
+            cache.put(key, recommendations)
+    # callers may modify the frame, the cached one must stay intact
+    return recommendations.copy() if isinstance(recommendations, pd.DataFrame) else recommendations
+
+
+def _timed(t_start, fn, *args):
+    """fn(*args) and the milliseconds from t_start until it returned."""
+    result = fn(*args)
+    return result, (time.perf_counter() - t_start) * 1000
+
+
+def _ensemble_scores(liked_games, disliked_games, exclude_games, attributes, description,
+                     alpha, beta, n_recommendations, cf_session, timings, deadline=ENSEMBLE_DEADLINE,
+                     text_scorer="llm"):
+    """ensemble_scores without the result cache."""
+    # if empty attributes
+    liked_games = liked_games or []
+    disliked_games = disliked_games or []
+    exclude_games = exclude_games or []
+    attributes = attributes or {}
 
-    # get cf_scores
+    timings = {} if timings is None else timings
+    t_start = t_stage = time.perf_counter()
 
-    cf_scores = get_cf_scores(liked_items = liked_games)
-    
-    # get cbf_scores
-    cbf_scores = get_cbf_scores(attributes=attributes)
+    def lap(stage):
+        nonlocal t_stage
+        now = time.perf_counter()
+        timings[stage] = (now - t_stage) * 1000
+        t_stage = now
 
-    # get llm_scores
-    llm_scores = get_llm_scores(
-        user_description=description or "",
-        attributes=attributes,
-    )
-    
-    # convert and validate input
-    cf_scores = np.array(cf_scores)
-    cbf_scores = np.array(cbf_scores)
-    llm_scores = np.array(llm_scores)
+    # --- Plan: attribute filters and exclusions -> candidate rows ---
+    candidates = plan_candidates(attributes, liked_games + disliked_games + exclude_games)
+    lap('plan')
+    if len(candidates) == 0:
+        return pd.DataFrame(), np.array([]), np.array([]), np.array([]), np.array([])
+
+    # --- Score: the models run concurrently, the LLM round trip first ---
+    # (each vector is memoized on its own inputs, see cf_vector/cbf_vector/llm_vector/lsa_vector)
+    executor = get_executor()
+    t_score = time.perf_counter()
+    futures = {}
+    if text_scorer in ("llm", "llm+lsa"):
+        futures['llm'] = executor.submit(_timed, t_score, llm_vector, description, attributes)
+    if text_scorer in ("lsa", "llm+lsa"):
+        futures['lsa'] = executor.submit(_timed, t_score, lsa_vector, description)
+    cf_future = executor.submit(_timed, t_score, cf_vector, liked_games, cf_session)
+    cbf_future = executor.submit(_timed, t_score, cbf_vector, attributes)
+
+    # CF and CBF take milliseconds and are always waited for; the deadline bounds the LLM
+    cf_vec, timings['cf'] = cf_future.result()
+    cbf_vec, timings['cbf'] = cbf_future.result()
+    # normalized over the whole catalog, as before the candidate planning: rescaling over the
+    # candidates alone would change the weight of each model in the blend
+    cf_scores = minmax_normalize(cf_vec)[candidates]
+    cbf_scores = minmax_normalize(cbf_vec)[candidates]
+
+    # the text scores are the mean of the scorers that answered (LLM scores as they are, LSA
+    # cosines normalized over the catalog like CF/CBF); all zeros if none did, and beta=0 below
+    degraded = {}
+    text_scores = []
+    for scorer, future in futures.items():
+        remaining = None if deadline is None else max(0.0, deadline - (time.perf_counter() - t_start))
+        try:
+            vector, timings[scorer] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            degraded[scorer] = f'timeout after {deadline:.1f} s'
+        except Exception as e:
+            degraded[scorer] = f'error: {type(e).__name__}: {e}'
+        if scorer in degraded:
+            timings[scorer] = (time.perf_counter() - t_score) * 1000
+            continue
+        if scorer == 'lsa':
+            vector = minmax_normalize(vector)
+        text_scores.append(vector[candidates].astype(np.float64))
+    llm_scores = np.mean(text_scores, axis=0) if text_scores else np.zeros(len(candidates))
+    t_stage = time.perf_counter()
 
     # handle zero-score cases
     cf_zero = np.all(cf_scores == 0)
@@ -147,90 +325,36 @@ def ensemble_scores(liked_games=None,
     cbf_component = cbf_scores * (1 - alpha)
     combined_cf_cbf = (cf_component + cbf_component) * (1 - beta)
     llm_component = llm_scores * beta
-    hybrid_scores = combined_cf_cbf + llm_component
-
-    # start with hybrid scores
-    final_scores = hybrid_scores.copy()
-
-    # if empty attributes
-    liked_games = liked_games or []
-    disliked_games = disliked_games or []
-    exclude_games = exclude_games or []
-    attributes = attributes or {}
-
-    # --- Apply exclusion filters ---
-    for gid in liked_games + disliked_games + exclude_games:
-        if gid in games_df.index:
-            idx = games_df.index.get_loc(gid)
-            final_scores[idx] = 0
-    
-    # --- Apply attribute filters ---
-    if APPLY_ATTRIBUTE_FILTERS and attributes:
-        # Multi-label attributes
-        for attr_name in ['game_categories', 'game_mechanics', 'game_types']:
-            selected = attributes.get(attr_name, [])
-            if selected and any(isinstance(s, str) and s.strip() for s in selected):
-                selected_clean = [s.strip().lower() for s in selected if isinstance(s, str) and s.strip()]
-                mask = games_df[attr_name].apply(
-                    lambda ga: isinstance(ga, list) and len(ga) > 0 and 
-                               any(isinstance(a, str) and a.strip().lower() in selected_clean for a in ga)
-                )
-                final_scores[~mask.values] = 0
-
-        # Numeric attributes
-        if 'game_weight' in attributes:
-            weight_range = attributes['game_weight']
-            if isinstance(weight_range, (list, tuple)) and len(weight_range) == 2:
-                w_min, w_max = weight_range
-                mask = (games_df['game_weight'] >= w_min) & (games_df['game_weight'] <= w_max)
-                final_scores[~mask.values] = 0
-
-        if 'players' in attributes:
-            players_range = attributes['players']
-            if isinstance(players_range, (list, tuple)) and len(players_range) == 2:
-                p_min, p_max = players_range
-                mask = (games_df['players_max'] >= p_min) & (games_df['players_min'] <= p_max)
-                final_scores[~mask.values] = 0
-
-        if 'play_time' in attributes:
-            time_range = attributes['play_time']
-            if isinstance(time_range, (list, tuple)) and len(time_range) == 2:
-                t_min, t_max = time_range
-                mask = (games_df['time_max'] >= t_min) & (games_df['time_min'] <= t_max)
-                final_scores[~mask.values] = 0
-
-        if 'year_published' in attributes:
-            year_range = attributes['year_published']
-            if isinstance(year_range, (list, tuple)) and len(year_range) == 2:
-                y_min, y_max = year_range
-                mask = (games_df['year_published'] >= y_min) & (games_df['year_published'] <= y_max)
-                final_scores[~mask.values] = 0
-
-        if 'min_rating' in attributes:
-            min_rating = attributes['min_rating']
-            if isinstance(min_rating, (list, tuple)) and len(min_rating) > 0:
-                min_rating = min_rating[0]
-                mask = (games_df['avg_rating'] >= min_rating)
-                final_scores[~mask.values] = 0
+    final_scores = combined_cf_cbf + llm_component
+    lap('combine')
 
     # Select top N recommendations ---
-    valid_idx = np.where(final_scores >= 0.01)[0]
-    if len(valid_idx) == 0:
+    valid = np.flatnonzero(final_scores >= 0.01)
+    if len(valid) == 0:
         return pd.DataFrame(), np.array([]), np.array([]), np.array([]), np.array([])
 
-    top_n_idx = valid_idx[np.argsort(final_scores[valid_idx])[::-1][:n_recommendations]]
-
-    recommendations = games_df.iloc[top_n_idx][[
-        'bgg_id', 'name', 'avg_rating', 'game_categories',
-        'game_mechanics', 'game_weight', 'game_types',
-        'year_published', 'players_min', 'players_max'
-    ]].copy()
-
-    recommendations['recommender_score'] = final_scores[top_n_idx].round(4)
-    recommendations['cf_score_component'] = cf_component[top_n_idx].round(4)
-    recommendations['cbf_score_component'] = cbf_component[top_n_idx].round(4)
-    recommendations['llm_score_component'] = llm_component[top_n_idx].round(4)
+    n_top = max(0, min(n_recommendations, len(valid)))
+    if 0 < n_top < len(valid):
+        valid = valid[np.argpartition(-final_scores[valid], n_top - 1)[:n_top]]
+    top = valid[np.argsort(-final_scores[valid], kind='stable')][:n_top]
+    top_n_idx = candidates[top]
+    lap('top_n')
+
+    recommendations = games_df.iloc[top_n_idx][
+        [col for col in RECOMMENDATION_COLUMNS if col not in game_labels]
+    ].copy()
+    # label lists are materialized for the returned rows only
+    for col, labels in game_labels.items():
+        recommendations[col] = labels.rows(top_n_idx)
+    recommendations = recommendations[RECOMMENDATION_COLUMNS]
+
+    recommendations['recommender_score'] = final_scores[top].round(4)
+    recommendations['cf_score_component'] = cf_component[top].round(4)
+    recommendations['cbf_score_component'] = cbf_component[top].round(4)
+    recommendations['llm_score_component'] = llm_component[top].round(4)
     recommendations['n_rank'] = range(1, len(recommendations) + 1)
+    recommendations.attrs['degraded'] = degraded
+    recommendations.attrs['text_scorer'] = text_scorer
 
     return recommendations
 
@@ -294,9 +418,10 @@ def display_recommendations(liked_games,
         llm_component = row.get("llm_score_component", 0.0)
         print(f"    CF: {cf_component:.4f} | CBF: {cbf_component:.4f} | LLM: {llm_component:.4f}")
         print(f"    User Rating: {game.get('avg_rating', 'N/A'):.2f}")
-        print(f"    Categories: {', '.join(game.get('game_categories', []))}")
-        print(f"    Game Types: {', '.join(game.get('game_types', []))}")
-        print(f"    Mechanics:  {', '.join(game.get('game_mechanics', []))}")
+        # the label lists are only in the recommendations, games_df has no label columns
+        print(f"    Categories: {', '.join(row.get('game_categories', []))}")
+        print(f"    Game Types: {', '.join(row.get('game_types', []))}")
+        print(f"    Mechanics:  {', '.join(row.get('game_mechanics', []))}")
         print(f"    Year: {int(game.get('year_published', 0))} "
               f"| Players: {int(game.get('players_min', 0))}–{int(game.get('players_max', 0))}\n")
 
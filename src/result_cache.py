@@ -0,0 +1,293 @@
+"""
+result_cache.py
+Cache of finished recommendation results in front of model_ensemble.ensemble_scores.
+
+Queries are canonicalized before hashing (sorted, de-duplicated ids and labels, numbers as
+floats, description with whitespace collapsed), so re-submitting the same sidebar settings
+in a different order or with a stray space reuses the earlier result instead of re-running
+CF, CBF, the filters and the paid LLM call.
+
+Two tiers: an in-process LRU bounded by entry count and age, and an optional SQLite file
+that survives restarts and is shared by app processes on one host. Entries on disk are
+tagged with a model version, so retrained models or a rebuilt catalog never serve old
+results, and stored as JSON (encode_value), so a writable cache file cannot run code in
+the app the way a pickle could. stats() reports hits per tier and misses.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 15 * 60  # seconds
+# set to e.g. "./data/result_cache.sqlite" to keep results across restarts
+RESULT_CACHE_PATH = None
+
+
+def _canonical_ids(ids) -> list:
+    return sorted({int(i) for i in (ids if ids is not None else [])})
+
+
+def _canonical_value(value):
+    """Label lists become sorted unique strings, numbers floats; the order of numbers is kept."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        value = value.tolist() if isinstance(value, np.ndarray) else list(value)
+        if all(isinstance(v, str) for v in value):
+            return sorted(set(value))
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return None if math.isnan(number) else number
+
+
+def canonical_query(liked_games=None, disliked_games=None, exclude_games=None, attributes=None,
+                    description=None, alpha=0.5, beta=0.33, n_recommendations=5, **extra) -> str:
+    """
+    Canonical JSON text of an ensemble_scores query.
+
+    Attributes that are missing, None or empty are dropped (every scorer treats them as
+    unset); label case is kept, since the CBF vocabulary lookup is case-sensitive.
+    extra holds anything else the result depends on (e.g. whether filters are applied).
+    """
+    attributes = {
+        name: _canonical_value(value) for name, value in (attributes or {}).items()
+        if value is not None and not (hasattr(value, "__len__") and len(value) == 0)
+    }
+    description = " ".join((description or "").split())
+    return json.dumps({
+        "liked": _canonical_ids(liked_games),
+        "disliked": _canonical_ids(disliked_games),
+        "exclude": _canonical_ids(exclude_games),
+        "attributes": attributes,
+        "description": hashlib.sha256(description.encode("utf-8")).hexdigest(),
+        "alpha": float(alpha),
+        "beta": float(beta),
+        "n": int(n_recommendations),
+        **{name: _canonical_value(value) for name, value in extra.items()},
+    }, sort_keys=True)
+
+
+def query_key(*args, **kwargs) -> str:
+    """SHA-256 of canonical_query(*args, **kwargs)."""
+    return hashlib.sha256(canonical_query(*args, **kwargs).encode("utf-8")).hexdigest()
+
+
+def _to_json(value):
+    """value as JSON-compatible data, containers other than str-keyed dicts and lists tagged."""
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": {
+            "index": _to_json(value.index.to_numpy()),
+            "index_name": value.index.name,
+            "columns": [[name, _to_json(value[name].to_numpy())] for name in value.columns],
+            "attrs": _to_json(value.attrs),
+        }}
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return {"__list__": [_to_json(v) for v in value.tolist()]}
+        return {"__array__": value.tolist(), "dtype": value.dtype.str}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_to_json(v) for v in value]}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _to_json(v) for k, v in value.items()}
+        return {"__items__": [[_to_json(k), _to_json(v)] for k, v in value.items()]}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot store a {type(value).__name__} in the result cache")
+
+
+def _from_json(data):
+    if isinstance(data, list):
+        return [_from_json(v) for v in data]
+    if not isinstance(data, dict):
+        return data
+    if "__frame__" in data:
+        frame = data["__frame__"]
+        df = pd.DataFrame({name: _from_json(column) for name, column in frame["columns"]},
+                          index=pd.Index(_from_json(frame["index"]), name=frame["index_name"]))
+        df.attrs.update(_from_json(frame["attrs"]))
+        return df
+    if "__array__" in data:
+        return np.array(data["__array__"], dtype=data["dtype"])
+    if "__list__" in data:
+        # object column: one Python value per row
+        values = [_from_json(v) for v in data["__list__"]]
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    if "__tuple__" in data:
+        return tuple(_from_json(v) for v in data["__tuple__"])
+    if "__items__" in data:
+        return {_from_json(k): _from_json(v) for k, v in data["__items__"]}
+    return {k: _from_json(v) for k, v in data.items()}
+
+
+def encode_value(value) -> bytes:
+    """
+    JSON bytes of a cached value: None, bools, numbers, strings and lists/tuples/dicts of
+    them, numpy arrays and DataFrames (with their attrs). Anything else raises TypeError.
+    """
+    return json.dumps(_to_json(value)).encode("utf-8")
+
+
+def decode_value(blob: bytes):
+    """Inverse of encode_value; raises ValueError if blob is not such JSON."""
+    return _from_json(json.loads(blob))
+
+
+class ResultCache:
+    """
+    Two-tier result cache.
+
+    Parameters
+    ----------
+    max_entries : int
+        entries kept in memory; the least recently used is evicted beyond this
+    ttl : float
+        seconds an entry stays valid, in both tiers
+    path : str, optional
+        SQLite file of the on-disk tier, None for memory only
+    version : str
+        model/data version; disk entries of another version are never returned
+    max_disk_entries : int, optional
+        entries kept on disk; the oldest are deleted beyond this (None: bounded by ttl only)
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, path=None, version="",
+                 max_disk_entries=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.version = version
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # one connection shared by the app's script threads, serialized by the lock
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, version TEXT, created REAL, value BLOB)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value of key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, value = entry
+                if time.monotonic() < expires:
+                    self._memory.move_to_end(key)
+                    self._counts["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._counts["expired"] += 1
+
+            entry = self._disk_get(key)
+            if entry is not None:
+                created, value = entry
+                self._counts["disk_hits"] += 1
+                # valid in memory only for what is left of the disk entry's ttl
+                self._remember(key, value, ttl=created + self.ttl - time.time())
+                return value
+            self._counts["misses"] += 1
+            return None
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, version, created, value) VALUES (?, ?, ?, ?)",
+                    (key, self.version, time.time(), encode_value(value)),
+                )
+                if self.max_disk_entries is not None:
+                    evicted = self._db.execute(
+                        "DELETE FROM results WHERE key IN "
+                        "(SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,),
+                    ).rowcount
+                    self._counts["evictions"] += max(evicted, 0)
+                self._db.commit()
+
+    def _remember(self, key, value, ttl=None):
+        self._memory[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counts["evictions"] += 1
+
+    def _disk_get(self, key):
+        """(created, value) of a valid disk entry, or None."""
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT created, value FROM results WHERE key = ? AND version = ?", (key, self.version)
+        ).fetchone()
+        if row is None:
+            return None
+        created, blob = row
+        if time.time() - created < self.ttl:
+            try:
+                return created, decode_value(blob)
+            except ValueError:
+                # not JSON, e.g. a pickle written by an earlier version: never unpickled
+                pass
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._db.commit()
+        self._counts["expired"] += 1
+        return None
+
+    def purge(self) -> None:
+        """Drop expired entries from disk, and entries of other versions."""
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM results WHERE version != ? OR created < ?",
+                                 (self.version, time.time() - self.ttl))
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters; hit_rate counts hits of both tiers."""
+        with self._lock:
+            counts = dict(self._counts, entries=len(self._memory))
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        counts["hit_rate"] = (counts["memory_hits"] + counts["disk_hits"]) / lookups if lookups else 0.0
+        return counts
+
+
+@lru_cache(maxsize=None)
+def get_result_cache(path: Optional[str] = RESULT_CACHE_PATH, version: str = "") -> ResultCache:
+    """Process-wide result cache for one disk path and model version."""
+    cache = ResultCache(path=path, version=version)
+    cache.purge()
+    return cache
@@ -0,0 +1,90 @@
+"""
+score_cache.py
+Memoized per-model score vectors for model_ensemble.
+CF, CBF and the LLM scorer depend on disjoint inputs: the liked games; the label and
+numeric attributes; the description and the filters. Each model's full, un-normalized
+score vector (catalog row order, float32) is kept under a key built from its own inputs
+only, in one LRU bounded by bytes. Changing one sidebar input then recomputes one model
+and reuses the other two vectors; normalization over the candidates happens per request.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+
+SCORE_CACHE_BYTES = 64 * 2**20
+
+
+class ScoreCache:
+    """
+    LRU of score vectors keyed by (component, key).
+
+    Stored vectors are float32 and read-only, shared by every caller; copy before modifying.
+
+    Parameters
+    ----------
+    max_bytes : int
+        total size of the stored vectors; least recently used ones are evicted beyond it
+    """
+
+    def __init__(self, max_bytes: int = SCORE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def _count(self, component, outcome):
+        counts = self._counts.setdefault(component, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def get(self, component: str, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            scores = self._vectors.get((component, key))
+            if scores is None:
+                self._count(component, "misses")
+                return None
+            self._vectors.move_to_end((component, key))
+            self._count(component, "hits")
+            return scores
+
+    def put(self, component: str, key: Hashable, scores) -> np.ndarray:
+        """Store scores as a read-only float32 vector and return it."""
+        scores = np.array(scores, dtype=np.float32)
+        scores.flags.writeable = False
+        with self._lock:
+            old = self._vectors.pop((component, key), None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._vectors[(component, key)] = scores
+            self.nbytes += scores.nbytes
+            while self.nbytes > self.max_bytes and len(self._vectors) > 1:
+                _, evicted = self._vectors.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return scores
+
+    def get_or_compute(self, component: str, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Cached vector, or compute() stored under key (computed outside the lock)."""
+        scores = self.get(component, key)
+        return scores if scores is not None else self.put(component, key, compute())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        """Hits and misses per component, plus the entries and bytes held."""
+        with self._lock:
+            stats = {component: dict(counts) for component, counts in self._counts.items()}
+            stats.update(entries=len(self._vectors), bytes=self.nbytes)
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_score_cache() -> ScoreCache:
+    """Process-wide score vector cache."""
+    return ScoreCache()
@@ -0,0 +1,131 @@
+"""
+text_index.py
+BM25 retrieval over the full game descriptions (data/game_descriptions.csv).
+Term-major postings are kept as flat arrays (CSR over terms): for term t, the documents
+docs[indptr[t]:indptr[t + 1]] and their precomputed BM25 weights. A query is a scatter-add
+of the postings of its terms, with no model, network or vectorizer involved. The index is
+built offline by scripts/build_text_index.py; llm.candidate_pool uses it to choose the
+games sent to the LLM.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from catalog import DESCRIPTIONS_PATH, get_descriptions
+
+INDEX_PATH = "./data/description_index.npz"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# words every description or request shares; they only add postings
+STOP_WORDS = frozenset("""
+a about all also an and any are as at be been but by can do for from game games get has
+have he her his i if in into is it its just like looking love me more most my no not of
+on one or our play player players she so some something such than that the their them
+then there these they this to up us very want was we were what when where which who
+will with would you your
+""".split())
+
+
+def tokenize(text) -> List[str]:
+    """Lower-cased alphanumeric words of text, without stop words and single characters."""
+    if not isinstance(text, str):
+        return []
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOP_WORDS]
+
+
+class TextIndex:
+    """
+    BM25 index over a set of documents.
+
+    Parameters
+    ----------
+    vocab : array
+        sorted terms; term t is vocab[t]
+    indptr : array
+        term t is in the documents docs[indptr[t]:indptr[t + 1]]
+    docs : array
+        document positions grouped by term
+    weights : array
+        BM25 weight of the term in the document, aligned with docs
+    doc_ids : array
+        bgg_id of every document position
+    """
+
+    def __init__(self, vocab, indptr, docs, weights, doc_ids):
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.docs = np.asarray(docs, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self._term_ids = {term: t for t, term in enumerate(self.vocab.tolist())}
+
+    @classmethod
+    def build(cls, doc_ids, texts, k1=BM25_K1, b=BM25_B):
+        """
+        Index texts (one document per bgg_id in doc_ids).
+
+        weight = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len)), with the
+        non-negative idf = log(1 + (N - df + 0.5) / (df + 0.5)).
+        """
+        tokens = [tokenize(text) for text in texts]
+        lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+        codes, vocab = pd.factorize(pd.Series([t for doc in tokens for t in doc], dtype=object), sort=True)
+        n_docs, n_terms = len(tokens), len(vocab)
+
+        # (term, doc) pairs sorted by term, then doc, with their term frequency
+        pairs, tf = np.unique(codes * n_docs + np.repeat(np.arange(n_docs), lengths), return_counts=True)
+        terms, docs = pairs // n_docs, pairs % n_docs
+        df = np.bincount(terms, minlength=n_terms)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1e-9))
+        weights = idf[terms] * tf * (k1 + 1) / (tf + norm[docs])
+
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+        return cls(np.asarray(vocab, dtype=str), indptr, docs, weights, doc_ids)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        data = np.load(path)
+        return cls(data["vocab"], data["indptr"], data["docs"], data["weights"], data["doc_ids"])
+
+    def save(self, path=INDEX_PATH):
+        np.savez(path, vocab=self.vocab, indptr=self.indptr, docs=self.docs, weights=self.weights,
+                 doc_ids=self.doc_ids)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def query_terms(self, query: str) -> np.ndarray:
+        """Distinct indexed terms of query."""
+        return np.unique([self._term_ids[t] for t in tokenize(query) if t in self._term_ids]).astype(np.int64)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document (document order); all 0 if no query term is indexed."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for t in self.query_terms(query):
+            start, end = self.indptr[t], self.indptr[t + 1]
+            # a term lists each document once, so the fancy-indexed add is exact
+            scores[self.docs[start:end]] += self.weights[start:end]
+        return scores
+
+
+@lru_cache(maxsize=None)
+def get_text_index(index_path: str = INDEX_PATH, descriptions_path: str = DESCRIPTIONS_PATH) -> TextIndex:
+    """
+    Process-wide description index: the one built by scripts/build_text_index.py, or, when it
+    is missing or older than the descriptions csv, one built in-process from get_descriptions().
+    """
+    if os.path.exists(index_path) and (not os.path.exists(descriptions_path)
+                                       or os.path.getmtime(index_path) >= os.path.getmtime(descriptions_path)):
+        return TextIndex.load(index_path)
+    descriptions = get_descriptions(descriptions_path)
+    return TextIndex.build(descriptions["bgg_id"].to_numpy(), descriptions["full_description"])